@@ -1,35 +1,33 @@
 from langchain_core.messages import AIMessage
 
 from model.groq_client import llm
-from prompts.calculator_prompt import calculator_prompt
+from model.scheduler import Priority, call_options
+from prompts.calculator_prompt import build_calculator_prompt
 from tools.calculator import calculate
-from utils.message_formatter import format_messages
 from utils.message_utils import get_recent_messages
+from utils.profiling import profiled
 
 
-def calculator_node(state):
+@profiled("node")
+def calculator_node(state, config):
     # Step 1: Get recent conversation
     recent_messages = get_recent_messages(
         state["messages"],
         limit = 1
     )
 
-    # Step 2: Convert conversation into text
-    conversation = format_messages(
+    # Step 2: Build calculator prompt
+    prompt = build_calculator_prompt(
         recent_messages
     )
 
-    # Step 3: Build calculator prompt
-    prompt = calculator_prompt(
-        conversation=conversation
-    )
-
-    # Step 4: Extract mathematical expression
+    # Step 3: Extract mathematical expression
     expression = llm.invoke(
-        prompt
+        prompt,
+        **call_options(config, Priority.STANDARD)
     ).content.strip()
 
-    # Step 5: Handle non-calculation queries
+    # Step 4: Handle non-calculation queries
     if expression == "INVALID":
         return {
             "messages": [
@@ -47,7 +45,7 @@ def calculator_node(state):
     print(repr(expression))
     print("=" * 50)
 
-    # Step 6: Evaluate expression
+    # Step 5: Evaluate expression
     try:
         result = calculate(
             expression
@@ -65,7 +63,7 @@ def calculator_node(state):
             ]
         }
 
-    # Step 7: Return updated state
+    # Step 6: Return updated state
     return {
         "messages": [
             AIMessage(
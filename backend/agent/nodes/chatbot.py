@@ -1,13 +1,15 @@
-from langchain_core.messages import SystemMessage
-from prompts.chatbot import get_chatbot_prompt
-from model.groq_client import llm
+from prompts.chatbot import build_chatbot_prompt
+from model.groq_client import generation_llm
+from model.scheduler import Priority, call_options
+from utils.profiling import profiled
 
-def chatbot_node(state):
-    messages = [
-        SystemMessage(content=get_chatbot_prompt()),
-        *state["messages"]
-    ]
-    response = llm.invoke(messages)
+@profiled("node")
+def chatbot_node(state, config):
+    messages = build_chatbot_prompt(state["messages"])
+    response = generation_llm.invoke(
+        messages,
+        **call_options(config, Priority.INTERACTIVE)
+    )
     
     return {"messages": [response]}
     
\ No newline at end of file
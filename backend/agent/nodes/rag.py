@@ -1,64 +1,146 @@
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, BaseMessage
 
-from model.groq_client import llm
-from rag.retriever import get_retriever
-from rag.formatter import format_documents
+from config.settings import (
+    KEYWORD_FAST_PATH_ENABLED,
+    KEYWORD_FAST_PATH_MAX_WORDS,
+)
+from model.groq_client import generation_llm
+from model.scheduler import (
+    CallGroup,
+    LLMQueueTimeout,
+    Priority,
+    call_group,
+    call_options,
+)
+from rag.retriever import keyword_search, retrieve_documents
+from rag.batch_retriever import RetrievalBatcher
+from rag.vector_store import get_index_version
 from prompts.rag_prompt import build_rag_prompt
 from utils.message_utils import get_recent_messages
-from utils.message_formatter import format_messages
+from utils.single_flight import get_single_flight, normalize_query
+from utils.profiling import profiled
 from agent.services.query_rewriter import rewrite_query
 
-def rag_node(state):
-    # Step 1: Get retriever
-    retriever = get_retriever()
+answer_flight = get_single_flight("rag_answer")
 
-    # Step 2: Get recent conversation
+
+@profiled("node")
+def rag_node(state, config):
+    # Step 1: Get recent conversation
     recent_messages = get_recent_messages(
         state["messages"],
         limit=4
     )
 
-    # Step 3: Convert conversation into text
-    conversation_text = format_messages(
-        recent_messages
-    )
+    # step 2: Rewriting Standalone Query
+    # A short first message has no earlier turns to resolve, so it is
+    # searched as typed, by keyword, without the rewriter.
+    keyword_only = is_keyword_query(state["messages"])
+    if keyword_only:
+        rewritten_query = str(state["messages"][-1].content).strip()
+    else:
+        rewritten_query = rewrite_query(
+            recent_messages,
+            **call_options(config, Priority.STANDARD)
+        )
 
-    # step 4: Rewriting Standalone Query
-    rewritten_query = rewrite_query(
-        conversation_text
+    # Step 3: Retrieve and generate
+    # Concurrent requests with the same standalone query share one
+    # retrieval + generation run, as long as they read the same index
+    # version. The shared run is as urgent as its most urgent caller
+    # and lasts until the last caller's deadline; if it still times out
+    # in the LLM queue, callers with time left run it again. A batch
+    # item that waits for another run's answer never retrieves, so its
+    # batch stops waiting for it.
+    batcher = config["configurable"].get("retrieval_batcher")
+    member = config["configurable"]["thread_id"]
+    group = call_group(config, Priority.INTERACTIVE)
+    response = answer_flight.do(
+        (
+            get_index_version(),
+            keyword_only,
+            normalize_query(rewritten_query)
+        ),
+        lambda: answer_question(
+            rewritten_query,
+            group,
+            keyword_only,
+            batcher,
+            member
+        ),
+        group=group,
+        on_wait=(lambda: batcher.leave(member)) if batcher else None,
+        retry_on=(LLMQueueTimeout,)
     )
 
-    # Step 5: Retrieve relevant documents
-    documents = retriever.invoke(
-        rewritten_query
-    )
+    # Step 4: Return updated state
+    # Every thread records its own copy of a shared answer.
+    return {
+        "messages": [response.model_copy(update={"id": None})]
+    }
+
+
+def is_keyword_query(messages: list[BaseMessage]) -> bool:
+    """
+    Returns True for a short question that opens a conversation.
+    """
+    if not KEYWORD_FAST_PATH_ENABLED or len(messages) != 1:
+        return False
+
+    words = str(messages[-1].content).split()
+    return 0 < len(words) <= KEYWORD_FAST_PATH_MAX_WORDS
 
-    # Step 6: Handle no retrieval results
+
+def answer_question(
+    question: str,
+    group: CallGroup,
+    keyword_only: bool = False,
+    batcher: RetrievalBatcher | None = None,
+    member: str | None = None,
+) -> AIMessage:
+    # Step 1: Retrieve relevant documents
+    # Keyword queries skip the embedding pass unless BM25 finds
+    # nothing. Batch items share embedding and vector search work
+    # with the other items of their batch.
+    documents = []
+    if keyword_only:
+        documents = keyword_search(
+            question
+        )
+
+    if documents and batcher is not None:
+        batcher.leave(member)
+    elif batcher is not None:
+        documents = batcher.retrieve(
+            question,
+            member
+        )
+    elif not documents:
+        documents = retrieve_documents(
+            question
+        )
+
+    # Step 2: Handle no retrieval results
     if not documents:
-        return {
-            "messages": [
-                AIMessage(
-                    content=(
-                        "I don't have enough information in my "
-                        "knowledge base to answer that question."
-                    )
-                )
-            ]
-        }
-
-    # Step 7: Format retrieved documents
-    context = format_documents(
-        documents
-    )
+        return AIMessage(
+            content=(
+                "I don't have enough information in my "
+                "knowledge base to answer that question."
+            )
+        )
 
-    # Step 8: Build RAG prompt
+    # Step 3: Build RAG prompt
+    # Lower-ranked documents are dropped if the context is over budget.
     prompt = build_rag_prompt(
-        question=rewritten_query,
-        context=context
+        question=question,
+        documents=documents
     )
 
-    # Step 9: Generate response
-    response = llm.invoke(prompt)
+    # Step 4: Generate response
+    response = generation_llm.invoke(
+        prompt,
+        group=group
+    )
 
     #testing
     # print("=" * 60)
@@ -70,8 +152,4 @@ def rag_node(state):
 
     # print("=" * 60)
 
-    # Step 10: Return updated state
-    return {
-        "messages": [response]
-    }
-
+    return response
@@ -1,30 +1,41 @@
 # from langchain_core.messages import HumanMessage
 from agent.routes import Route
 from model.groq_client import llm
+from model.scheduler import LLMQueueTimeout, Priority, call_group
 from prompts.router_prompt import build_router_prompt
 from utils.message_utils import get_recent_messages
-from utils.message_formatter import format_messages
+from utils.single_flight import get_single_flight
+from utils.profiling import profiled
 
-def router_node(state):
+router_flight = get_single_flight("router")
+
+@profiled("node")
+def router_node(state, config):
     # Step 1: Get recent conversation
     recent_messages = get_recent_messages(
         state["messages"],
         limit=4
     )
 
-    # Step 2: Convert conversation to text
-    conversation = format_messages(recent_messages)
+    # Step 2: Build router prompt
+    prompt = build_router_prompt(recent_messages)
 
-    # Step 3: Build router prompt
-    prompt = build_router_prompt(
-        conversation=conversation,
-        routes=Route
+    # Step 3: Ask the LLM
+    # Identical conversations in flight share one classification call.
+    # The system message is the same for every call, so the
+    # conversation alone identifies the prompt.
+    group = call_group(config, Priority.STANDARD)
+    response = router_flight.do(
+        prompt[-1].content,
+        lambda: llm.invoke(
+            prompt,
+            group=group
+        ),
+        group=group,
+        retry_on=(LLMQueueTimeout,)
     )
 
-    # Step 4: Ask the LLM
-    response = llm.invoke(prompt)
-
-    # Step 5: Normalize output
+    # Step 4: Normalize output
     route = (
         response.content
         .strip()
@@ -32,19 +43,32 @@ def router_node(state):
         .rstrip(".")
     )
 
-    # Step 6: Validate route
+    # Step 5: Validate route
+    # A malformed classification should not fail the whole request:
+    # look for a route name in the output, else default to rag as the
+    # router prompt does for ambiguous questions.
     try:
         validated_route = Route(route)
     except ValueError:
-        valid_routes = ", ".join(
-            route.value for route in Route
+        validated_route = next(
+            (
+                candidate for candidate in Route
+                if candidate.value in route
+            ),
+            Route.RAG
         )
-
-        raise ValueError(
+        print(
             f"Invalid route '{route}'. "
-            f"Expected one of: {valid_routes}"
+            f"Falling back to '{validated_route.value}'."
         )
 
+    # Step 6: Release the batch's retrieval
+    # A batch item answered without the knowledge base never
+    # retrieves, so its batch stops waiting for it.
+    batcher = config["configurable"].get("retrieval_batcher")
+    if batcher is not None and validated_route != Route.RAG:
+        batcher.leave(config["configurable"]["thread_id"])
+
     # Step 7: Return state update
     return {
         "route": validated_route.value
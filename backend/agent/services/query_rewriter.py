@@ -1,15 +1,33 @@
+from langchain_core.messages import BaseMessage
+
 from model.groq_client import llm
+from model.scheduler import CallGroup, LLMQueueTimeout, Priority
 from prompts.query_rewriter_prompt import build_query_rewriter_prompt
+from utils.message_formatter import format_messages
+from utils.single_flight import get_single_flight
+
+rewrite_flight = get_single_flight("query_rewriter")
 
 
 def rewrite_query(
-        conversation: str
+        messages: list[BaseMessage],
+        priority: Priority = Priority.STANDARD,
+        deadline: float | None = None
     ) -> str:
     prompt = build_query_rewriter_prompt(
-        conversation=conversation
+        messages
     )
+    group = CallGroup(priority, deadline)
     try:
-        response = llm.invoke(prompt)
+        response = rewrite_flight.do(
+            prompt[-1].content,
+            lambda: llm.invoke(
+                prompt,
+                group=group
+            ),
+            group=group,
+            retry_on=(LLMQueueTimeout,)
+        )
         rewritten_query = response.content.strip()
 
         #testing
@@ -23,7 +41,7 @@ def rewrite_query(
         # print("=" * 60)
 
         if not rewritten_query:
-            return conversation
+            return format_messages(messages)
         return rewritten_query
     except Exception:
-        return conversation
\ No newline at end of file
+        return format_messages(messages)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from config.settings import (
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_PER_USER_LIMIT,
+    ADMISSION_PER_THREAD_MAX_PENDING,
+    ADMISSION_RETRY_AFTER_SECONDS,
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is shed instead of queued.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        detail: str,
+        retry_after: float | None = None,
+    ):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the work a worker accepts.
+
+    A request is rejected up front when the worker already holds
+    `max_in_flight + max_queue` requests (503), when its user has
+    `per_user_limit` requests active, or when its thread already has
+    `per_thread_max_pending` (429). Admitted requests run one at a time
+    per thread_id, so two graph runs never race on one checkpoint, and
+    at most `max_in_flight` run at once. Requests still waiting when
+    their deadline passes are dropped (504).
+
+    All state is touched from the event loop only, so no locks are
+    needed.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        per_user_limit: int,
+        per_thread_max_pending: int,
+        retry_after_seconds: float,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.per_thread_max_pending = per_thread_max_pending
+        self.retry_after_seconds = retry_after_seconds
+
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._active = 0
+        self._running = 0
+        self._users: dict[str, int] = {}
+        self._threads: dict[str, int] = {}
+        self._thread_locks: dict[str, asyncio.Lock] = {}
+        self._counters = {
+            "admitted": 0,
+            "rejected_overload": 0,
+            "rejected_user": 0,
+            "rejected_thread": 0,
+            "dropped_deadline": 0,
+        }
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        user_id: str,
+        thread_id: str,
+        deadline: float,
+    ):
+        """
+        Holds an execution slot and the thread's lock while the body runs.
+
+        Args:
+            user_id: Caller's user id.
+            thread_id: Conversation thread id.
+            deadline: Monotonic time after which the client has given up.
+        """
+        self._check_limits(user_id, thread_id)
+
+        self._active += 1
+        self._users[user_id] = self._users.get(user_id, 0) + 1
+        self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+        thread_lock = self._thread_locks.setdefault(thread_id, asyncio.Lock())
+
+        try:
+            # Wait for the thread's previous turn before taking a slot,
+            # so a queued follow-up does not hold capacity.
+            await self._wait(thread_lock.acquire(), deadline)
+            try:
+                await self._wait(self._slots.acquire(), deadline)
+                try:
+                    self._counters["admitted"] += 1
+                    self._running += 1
+                    yield
+                finally:
+                    self._running -= 1
+                    self._slots.release()
+            finally:
+                thread_lock.release()
+        finally:
+            self._active -= 1
+            self._decrement(self._users, user_id)
+            if self._decrement(self._threads, thread_id) == 0:
+                self._thread_locks.pop(thread_id, None)
+
+    def _check_limits(self, user_id: str, thread_id: str) -> None:
+        if self._active >= self.max_in_flight + self.max_queue:
+            self._counters["rejected_overload"] += 1
+            raise AdmissionRejected(
+                503,
+                "Server is overloaded. Please retry later.",
+                self.retry_after_seconds
+            )
+
+        if self._users.get(user_id, 0) >= self.per_user_limit:
+            self._counters["rejected_user"] += 1
+            raise AdmissionRejected(
+                429,
+                "Too many concurrent requests for this user.",
+                self.retry_after_seconds
+            )
+
+        if self._threads.get(thread_id, 0) >= self.per_thread_max_pending:
+            self._counters["rejected_thread"] += 1
+            raise AdmissionRejected(
+                429,
+                "A previous message in this thread is still being processed.",
+                self.retry_after_seconds
+            )
+
+    async def _wait(self, acquire, deadline: float) -> None:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                raise TimeoutError
+            await asyncio.wait_for(acquire, timeout=remaining)
+        except TimeoutError:
+            acquire.close()
+            self._counters["dropped_deadline"] += 1
+            raise AdmissionRejected(
+                504,
+                "Request deadline passed while waiting to be processed."
+            )
+
+    @staticmethod
+    def _decrement(counts: dict[str, int], key: str) -> int:
+        remaining = counts[key] - 1
+        if remaining:
+            counts[key] = remaining
+        else:
+            del counts[key]
+        return remaining
+
+    def metrics(self) -> dict:
+        return {
+            **self._counters,
+            "in_flight": self._running,
+            "queued": self._active - self._running,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        per_user_limit=ADMISSION_PER_USER_LIMIT,
+        per_thread_max_pending=ADMISSION_PER_THREAD_MAX_PENDING,
+        retry_after_seconds=ADMISSION_RETRY_AFTER_SECONDS,
+    )
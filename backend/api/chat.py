@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ChatRequest(BaseModel):
     question: str
@@ -9,4 +9,20 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     status: str
     answer: str
-    thread_id: str
\ No newline at end of file
+    thread_id: str
+    profile: dict | None = None
+
+class ChatBatchRequest(BaseModel):
+    requests: list[ChatRequest] = Field(min_length=1)
+    max_concurrency: int | None = Field(default=None, ge=1)
+
+class ChatBatchItem(BaseModel):
+    index: int
+    status: str
+    thread_id: str
+    answer: str | None = None
+    error: str | None = None
+
+class ChatBatchResponse(BaseModel):
+    status: str
+    results: list[ChatBatchItem]
@@ -0,0 +1,184 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks.corpus import generate_questions
+from utils.latency import summarize
+
+
+def _route_of(graph, thread_id: str) -> str:
+    snapshot = graph.get_state(
+        {"configurable": {"thread_id": thread_id}}
+    )
+    return snapshot.values.get("route") or "unknown"
+
+
+async def _run_session(
+    client: httpx.AsyncClient,
+    graph,
+    questions: list[str],
+    semaphore: asyncio.Semaphore,
+    samples: list[dict],
+) -> None:
+    thread_id = f"bench-{uuid.uuid4().hex}"
+
+    # Turns of one thread are sent in order, like a real conversation.
+    for question in questions:
+        async with semaphore:
+            payload = {
+                "question": question,
+                "language": "en",
+                "thread_id": thread_id,
+                # One user per thread keeps per-user admission limits
+                # out of the measurement.
+                "user_id": thread_id,
+            }
+            started = time.perf_counter()
+            try:
+                response = await client.post("/chat", json=payload)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+
+        samples.append({
+            "route": _route_of(graph, thread_id) if ok else "error",
+            "latency": elapsed,
+            "ok": ok,
+        })
+
+
+async def run_chat_load(
+    app,
+    graph,
+    requests: int,
+    concurrency: int,
+    turns_per_thread: int,
+    route_weights: dict[str, float],
+    seed: int = 0,
+) -> dict:
+    """
+    Drives `/chat` in-process and reports throughput and latency.
+
+    Threads are run concurrently (bounded by `concurrency`); the turns
+    of a single thread are sequential, so the route stored in a thread's
+    checkpoint right after a turn is the route that turn took.
+    """
+    questions = generate_questions(requests, route_weights, seed=seed)
+    sessions = [
+        questions[start:start + turns_per_thread]
+        for start in range(0, len(questions), turns_per_thread)
+    ]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list[dict] = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://benchmark",
+        timeout=None,
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _run_session(client, graph, session, semaphore, samples)
+            for session in sessions
+        ))
+        wall_seconds = time.perf_counter() - started
+
+    per_route: dict[str, list[float]] = {}
+    for sample in samples:
+        if sample["ok"]:
+            per_route.setdefault(sample["route"], []).append(
+                sample["latency"]
+            )
+
+    latencies = [sample["latency"] for sample in samples if sample["ok"]]
+    errors = sum(1 for sample in samples if not sample["ok"])
+
+    return {
+        "requests": len(samples),
+        "concurrency": concurrency,
+        "turns_per_thread": turns_per_thread,
+        "wall_seconds": wall_seconds,
+        "throughput_rps": len(samples) / wall_seconds if wall_seconds else 0.0,
+        "errors": errors,
+        "latency_seconds": summarize(latencies),
+        "per_route_latency_seconds": {
+            route: summarize(values)
+            for route, values in sorted(per_route.items())
+        },
+    }
+
+
+async def run_batch_load(
+    app,
+    requests: int,
+    batch_size: int,
+    max_concurrency: int,
+    route_weights: dict[str, float],
+    seed: int = 0,
+) -> dict:
+    """
+    Sends the same questions once as sequential `/chat` calls and once
+    as `/chat/batch` calls, and reports both throughputs.
+    """
+    questions = generate_questions(requests, route_weights, seed=seed)
+    thread_ids = [f"bench-{uuid.uuid4().hex}" for _ in questions]
+    payloads = [
+        {
+            "question": question,
+            "language": "en",
+            "thread_id": thread_id,
+            "user_id": thread_id,
+        }
+        for question, thread_id in zip(questions, thread_ids)
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://benchmark",
+        timeout=None,
+    ) as client:
+        started = time.perf_counter()
+        for payload in payloads:
+            await client.post(
+                "/chat",
+                json={**payload, "thread_id": payload["thread_id"] + "-seq"}
+            )
+        sequential_seconds = time.perf_counter() - started
+
+        errors = 0
+        batch_latencies = []
+        started = time.perf_counter()
+        for start in range(0, len(payloads), batch_size):
+            batch_started = time.perf_counter()
+            response = await client.post(
+                "/chat/batch",
+                json={
+                    "requests": payloads[start:start + batch_size],
+                    "max_concurrency": max_concurrency,
+                },
+            )
+            batch_latencies.append(time.perf_counter() - batch_started)
+            errors += sum(
+                1 for item in response.json()["results"]
+                if item["status"] != "success"
+            )
+        batch_seconds = time.perf_counter() - started
+
+    return {
+        "requests": len(payloads),
+        "batch_size": batch_size,
+        "max_concurrency": max_concurrency,
+        "sequential_seconds": sequential_seconds,
+        "sequential_throughput_rps": len(payloads) / sequential_seconds,
+        "batch_seconds": batch_seconds,
+        "batch_throughput_rps": len(payloads) / batch_seconds,
+        "speedup": sequential_seconds / batch_seconds,
+        "batch_errors": errors,
+        "batch_latency_seconds": summarize(batch_latencies),
+    }
@@ -0,0 +1,276 @@
+import random
+from pathlib import Path
+
+
+CROPS = [
+    "rice", "wheat", "tomato", "sugarcane", "maize", "cotton",
+    "potato", "onion", "chickpea", "mustard", "soybean", "groundnut",
+]
+
+TOPICS = [
+    "blast disease", "leaf rust", "early blight", "stem borer",
+    "aphid infestation", "nitrogen deficiency", "drip irrigation",
+    "seed treatment", "weed management", "harvest timing",
+    "soil pH", "potassium application", "powdery mildew", "whitefly",
+]
+
+PHRASES = [
+    "Farmers should monitor the field every week for {topic} in {crop}.",
+    "Apply the recommended dose only after confirming {topic} symptoms.",
+    "In {crop}, {topic} is most severe during humid weather.",
+    "Resistant {crop} varieties reduce losses caused by {topic}.",
+    "Consult the local extension officer before treating {topic}.",
+    "Balanced fertilizer use improves {crop} tolerance to {topic}.",
+    "Early sowing of {crop} lowers the risk of {topic}.",
+]
+
+# Exact terms (active ingredients, inputs) tied to each topic, which
+# keyword search matches literally.
+TOPIC_TERMS = {
+    "blast disease": "tricyclazole",
+    "leaf rust": "propiconazole",
+    "early blight": "mancozeb",
+    "stem borer": "chlorantraniliprole",
+    "aphid infestation": "imidacloprid",
+    "nitrogen deficiency": "urea",
+    "drip irrigation": "emitters",
+    "seed treatment": "carbendazim",
+    "weed management": "pendimethalin",
+    "harvest timing": "grain moisture",
+    "soil pH": "agricultural lime",
+    "potassium application": "muriate of potash",
+    "powdery mildew": "wettable sulphur",
+    "whitefly": "thiamethoxam",
+}
+
+LABELLED_QUESTIONS = [
+    "{term} {crop}",
+    "{crop} {topic}",
+    "How do I manage {topic} in {crop}?",
+    "Is {term} recommended for {crop}?",
+    "What should I do about {topic} in my {crop} field?",
+]
+
+QUESTIONS = {
+    "rag": [
+        "What are the symptoms of {topic} in {crop}?",
+        "How do I manage {topic} in {crop}?",
+        "When should I check {crop} for {topic}?",
+    ],
+    "calculator": [
+        "I have {a} hectares and need {b} kg urea per hectare. How much urea?",
+        "What is {a} percent of {b} kg yield?",
+    ],
+    "chatbot": [
+        "Hello, who are you?",
+        "Thanks, that helped a lot!",
+    ],
+}
+
+
+def generate_chunks(
+    count: int,
+    seed: int = 0,
+    sentences_per_chunk: int = 6,
+) -> list[str]:
+    """
+    Returns `count` synthetic agronomy chunks.
+    """
+    generator = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        sentences = [
+            generator.choice(PHRASES).format(
+                crop=generator.choice(CROPS),
+                topic=generator.choice(TOPICS),
+            )
+            for _ in range(sentences_per_chunk)
+        ]
+        chunks.append(" ".join(sentences))
+    return chunks
+
+
+def generate_questions(
+    count: int,
+    route_weights: dict[str, float],
+    seed: int = 0,
+) -> list[str]:
+    """
+    Returns `count` questions mixed according to `route_weights`.
+    """
+    generator = random.Random(seed)
+    routes = list(route_weights)
+    weights = [route_weights[route] for route in routes]
+
+    questions = []
+    for _ in range(count):
+        route = generator.choices(routes, weights=weights)[0]
+        template = generator.choice(QUESTIONS[route])
+        questions.append(
+            template.format(
+                crop=generator.choice(CROPS),
+                topic=generator.choice(TOPICS),
+                a=generator.randint(1, 20),
+                b=generator.randint(50, 500),
+            )
+        )
+    return questions
+
+
+def generate_labelled_corpus(
+    count: int,
+    seed: int = 0,
+    sentences_per_chunk: int = 6,
+) -> tuple[list[str], list[str]]:
+    """
+    Returns `count` synthetic chunks and the "crop/topic" label of each.
+
+    Every chunk is about one crop and topic and names the topic's
+    exact term once; the rest of its sentences are about random crops
+    and topics, as in `generate_chunks`.
+    """
+    generator = random.Random(seed)
+    chunks = []
+    labels = []
+    for _ in range(count):
+        crop = generator.choice(CROPS)
+        topic = generator.choice(TOPICS)
+        sentences = [
+            generator.choice(PHRASES).format(crop=crop, topic=topic),
+            f"For {topic} in {crop}, {TOPIC_TERMS[topic]} is the usual choice.",
+        ]
+        sentences += [
+            generator.choice(PHRASES).format(
+                crop=generator.choice(CROPS),
+                topic=generator.choice(TOPICS),
+            )
+            for _ in range(sentences_per_chunk - len(sentences))
+        ]
+        generator.shuffle(sentences)
+        chunks.append(" ".join(sentences))
+        labels.append(f"{crop}/{topic}")
+    return chunks, labels
+
+
+def generate_labelled_queries(
+    count: int,
+    labels: set[str],
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Returns `count` queries, each with the labels of its relevant chunks.
+
+    Queries only target labels present in `labels`.
+    """
+    generator = random.Random(seed)
+    choices = sorted(labels)
+    queries = []
+    for _ in range(count):
+        label = generator.choice(choices)
+        crop, topic = label.split("/", 1)
+        template = generator.choice(LABELLED_QUESTIONS)
+        queries.append({
+            "query": template.format(
+                crop=crop,
+                topic=topic,
+                term=TOPIC_TERMS[topic],
+            ),
+            "labels": [label],
+        })
+    return queries
+
+
+def _escape_pdf_text(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace("(", "\\(")
+        .replace(")", "\\)")
+    )
+
+
+def write_text_pdf(
+    path: Path,
+    pages: list[list[str]],
+) -> None:
+    """
+    Writes a minimal single-font PDF with one text line per entry.
+
+    Keeps the benchmark free of PDF-authoring dependencies; the output
+    is readable by PyPDFLoader.
+    """
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+
+    for lines in pages:
+        stream_lines = ["BT", "/F1 10 Tf", "14 TL", "50 790 Td"]
+        for line in lines:
+            stream_lines.append(f"({_escape_pdf_text(line)}) Tj T*")
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines)
+
+        objects.append(
+            f"<< /Length {len(stream.encode('latin-1'))} >>\n"
+            f"stream\n{stream}\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {content_id} 0 R >>"
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n".encode("latin-1")
+    output += b"0000000000 65535 f \n"
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("latin-1")
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode("latin-1")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(output))
+
+
+def generate_pdfs(
+    directory: Path,
+    count: int,
+    pages_per_pdf: int,
+    lines_per_page: int = 50,
+    seed: int = 0,
+) -> list[Path]:
+    """
+    Writes `count` synthetic crop PDFs into `directory`.
+    """
+    generator = random.Random(seed)
+    paths = []
+    for index in range(count):
+        pages = [
+            [
+                generator.choice(PHRASES).format(
+                    crop=generator.choice(CROPS),
+                    topic=generator.choice(TOPICS),
+                )
+                for _ in range(lines_per_page)
+            ]
+            for _ in range(pages_per_pdf)
+        ]
+        path = directory / f"synthetic_{index:04d}.pdf"
+        write_text_pdf(path, pages)
+        paths.append(path)
+    return paths
@@ -0,0 +1,143 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from model.scheduler import TokenBucket
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+class FakeGroqServer:
+    """
+    Local stand-in for the Groq chat completions API.
+
+    Enforces its own requests-per-minute limit and can reject a random
+    share of requests, answering both with 429 and a Retry-After header
+    the way the real API does. Point the client at `base_url`.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        rate_limit_probability: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        latency_seconds: float = 0.1,
+        seed: int = 0,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after_seconds = retry_after_seconds
+        self.latency_seconds = latency_seconds
+        self.stats = {"requests": 0, "completed": 0, "rate_limited": 0}
+
+        self._bucket = TokenBucket(requests_per_minute)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            self._handler_class()
+        )
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _admit(self) -> float | None:
+        """
+        Returns None to serve the request, or the Retry-After seconds.
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            wait = self._bucket.wait_time(1, time.monotonic())
+            if wait > 0:
+                self.stats["rate_limited"] += 1
+                return max(wait, self.retry_after_seconds)
+            if self._random.random() < self.rate_limit_probability:
+                self.stats["rate_limited"] += 1
+                return self.retry_after_seconds
+            self._bucket.consume(1)
+            return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path != COMPLETIONS_PATH:
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+
+                retry_after = server._admit()
+                if retry_after is not None:
+                    self._send(
+                        429,
+                        {
+                            "error": {
+                                "message": "Rate limit reached.",
+                                "type": "requests",
+                                "code": "rate_limit_exceeded",
+                            }
+                        },
+                        {"retry-after": f"{retry_after:.2f}"},
+                    )
+                    return
+
+                time.sleep(server.latency_seconds)
+                with server._lock:
+                    server.stats["completed"] += 1
+
+                prompt = " ".join(
+                    str(message.get("content", ""))
+                    for message in request.get("messages", [])
+                )
+                prompt_tokens = max(len(prompt) // 4, 1)
+                self._send(200, {
+                    "id": f"chatcmpl-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "rag"},
+                        "logprobs": None,
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": 1,
+                        "total_tokens": prompt_tokens + 1,
+                    },
+                })
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,208 @@
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, BaseMessage
+
+
+GREETING_WORDS = {
+    "hello", "hi", "hey", "thanks", "thank", "bye", "who", "namaste",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+
+    if isinstance(prompt, BaseMessage):
+        return str(prompt.content)
+
+    return "\n".join(
+        str(message.content) if isinstance(message, BaseMessage)
+        else str(message)
+        for message in prompt
+    )
+
+
+def _latest_question(text: str) -> str:
+    # Prompts embed the conversation as "Human: \n<question>" blocks.
+    marker = "Human: \n"
+    if marker not in text:
+        return text.strip()
+
+    question = text.rsplit(marker, 1)[1]
+    return question.strip().split("\n", 1)[0]
+
+
+class FakeChatModel:
+    """
+    Offline stand-in for the Groq chat model.
+
+    Answers every prompt the graph sends (routing, query rewriting,
+    expression extraction and answer generation) after a simulated
+    latency of `latency_seconds + output_tokens / tokens_per_second`.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.2,
+        tokens_per_second: float = 250.0,
+        output_tokens: int = 150,
+        jitter: float = 0.0,
+        slow_probability: float = 0.0,
+        slow_factor: float = 10.0,
+        seed: int = 0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.jitter = jitter
+        self.slow_probability = slow_probability
+        self.slow_factor = slow_factor
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def invoke(self, input, config=None, **kwargs) -> AIMessage:
+        text = _prompt_text(input)
+        content = self._respond(text)
+        output_tokens = len(content.split())
+
+        delay = (
+            self.latency_seconds
+            + output_tokens / self.tokens_per_second
+        )
+        with self._lock:
+            self.calls += 1
+            if self.jitter:
+                delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+            # Occasional stragglers, to give tail-latency work a target.
+            if self._random.random() < self.slow_probability:
+                delay *= self.slow_factor
+
+        time.sleep(max(delay, 0.0))
+
+        input_tokens = max(len(text) // 4, 1)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _respond(self, text: str) -> str:
+        question = _latest_question(text)
+
+        if "intent classification engine" in text:
+            return self._route(question)
+
+        if "standalone search queries" in text:
+            return question
+
+        if "Expression Extraction Engine" in text:
+            numbers = re.findall(r"\d+(?:\.\d+)?", question)
+            if len(numbers) < 2:
+                return "INVALID"
+            return f"{numbers[0]} * {numbers[1]}"
+
+        return " ".join(["answer"] * self.output_tokens)
+
+    @staticmethod
+    def _route(question: str) -> str:
+        words = set(TOKEN_PATTERN.findall(question.lower()))
+        if re.search(r"\d", question):
+            return "calculator"
+        if words & GREETING_WORDS:
+            return "chatbot"
+        return "rag"
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Tiny deterministic embedding function based on feature hashing.
+
+    Produces unit-length vectors without loading a model, so retrieval
+    and ingestion can be benchmarked without the MiniLM forward pass.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(
+                token.encode("utf-8"),
+                digest_size=8
+            ).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm == 0:
+            vector[0] = 1.0
+            return vector
+
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def install_fake_llm(
+    model: FakeChatModel,
+    requests_per_minute: int = 0,
+    tokens_per_minute: int = 0,
+    hedging: bool = False,
+) -> None:
+    """
+    Replaces the shared Groq client with `model`, behind the same
+    scheduler and hedging wrapper production uses. Provider rate
+    limits are off unless given, so benchmarks measure the app rather
+    than the quota.
+
+    Must run before `agent.graph_builder` is imported, because the
+    nodes bind `llm` at import time.
+    """
+    from config.settings import LLM_MAX_CONCURRENCY
+    from model import groq_client
+    from model.scheduler import LLMScheduler
+
+    groq_client.llm = LLMScheduler(
+        model,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+    )
+    groq_client.generation_llm = groq_client.hedge(
+        groq_client.llm,
+        enabled=hedging,
+    )
+
+
+def use_vector_store(
+    persist_directory,
+    embeddings: Embeddings | None = None,
+) -> None:
+    """
+    Points `get_vector_store()` at `persist_directory`, optionally with
+    a replacement embedding function.
+    """
+    from rag import vector_store
+
+    vector_store.CHROMA_DB_DIR = persist_directory
+    if embeddings is not None:
+        vector_store.get_embedding_model = lambda: embeddings
+    vector_store.reset_index()
@@ -0,0 +1,64 @@
+import contextlib
+import io
+import time
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.corpus import generate_pdfs
+from benchmarks.fakes import use_vector_store
+
+
+def run_ingest_throughput(
+    workdir: Path,
+    embeddings: Embeddings | None,
+    pdfs: int,
+    pages_per_pdf: int,
+    seed: int = 0,
+) -> dict:
+    """
+    Times `ingest()` over freshly generated PDFs.
+
+    Runs twice: a cold pass that indexes everything and a warm pass
+    where every file is skipped by its hash.
+    """
+    from rag import ingest as ingest_module
+    from rag.vector_store import get_vector_store
+
+    raw_directory = workdir / "knowledge_base" / "raw"
+    generate_pdfs(raw_directory, pdfs, pages_per_pdf, seed=seed)
+
+    # Later suites (e.g. quality on the real knowledge base) ingest
+    # the project's own directory again.
+    root_dir = ingest_module.ROOT_DIR
+    pdf_directory = ingest_module.PDF_DIRECTORY
+    ingest_module.ROOT_DIR = workdir
+    ingest_module.PDF_DIRECTORY = raw_directory
+    try:
+        use_vector_store(workdir / "chroma_db", embeddings)
+
+        timings = {}
+        for phase in ("cold", "warm"):
+            started = time.perf_counter()
+            # ingest() reports progress with print; keep the output clean.
+            with contextlib.redirect_stdout(io.StringIO()):
+                ingest_module.ingest()
+            timings[phase] = time.perf_counter() - started
+
+        chunks = get_vector_store()._collection.count()
+    finally:
+        ingest_module.ROOT_DIR = root_dir
+        ingest_module.PDF_DIRECTORY = pdf_directory
+
+    cold = timings["cold"]
+
+    return {
+        "pdfs": pdfs,
+        "pages": pdfs * pages_per_pdf,
+        "chunks": chunks,
+        "cold_seconds": cold,
+        "warm_seconds": timings["warm"],
+        "pdfs_per_second": pdfs / cold if cold else 0.0,
+        "pages_per_second": pdfs * pages_per_pdf / cold if cold else 0.0,
+        "chunks_per_second": chunks / cold if cold else 0.0,
+    }
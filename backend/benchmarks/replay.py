@@ -0,0 +1,189 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+
+from utils.latency import summarize
+from utils.single_flight import single_flight_stats
+
+
+def group_by_thread(entries: list[dict]) -> dict[str, list[dict]]:
+    """
+    Groups captured entries by thread_id, keeping their original order.
+    """
+    threads: dict[str, list[dict]] = {}
+    for entry in entries:
+        threads.setdefault(entry["thread_id"], []).append(entry)
+    return threads
+
+
+def _replay_thread(
+    graph,
+    entries: list[dict],
+    origin: float,
+    replay_started: float,
+    speed: float | None,
+    samples: list[dict],
+    lock: threading.Lock,
+) -> None:
+    for entry in entries:
+        lag = None
+        if speed:
+            # Wait for the entry's original offset, scaled by `speed`.
+            due = replay_started + (entry["started_at"] - origin) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lag = max(time.perf_counter() - due, 0.0)
+
+        config = {
+            "configurable": {
+                "thread_id": entry["thread_id"],
+                "user_id": entry["user_id"],
+            }
+        }
+        state = {
+            "messages": [HumanMessage(content=entry["question"])],
+            "route": None,
+        }
+
+        started = time.perf_counter()
+        try:
+            final_state = graph.invoke(state, config=config)
+            route = final_state.get("route")
+            ok = True
+        except Exception:
+            route = None
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        with lock:
+            samples.append({
+                "captured": entry,
+                "route": route,
+                "latency_seconds": elapsed,
+                "lag_seconds": lag,
+                "ok": ok,
+            })
+
+
+def _stats_delta(before: dict, after: dict) -> dict:
+    delta = {}
+    for name, stats in after.items():
+        previous = before.get(name, {})
+        executions = stats["executions"] - previous.get("executions", 0)
+        shared = stats["shared"] - previous.get("shared", 0)
+        total = executions + shared
+        delta[name] = {
+            "executions": executions,
+            "shared": shared,
+            "hit_rate": shared / total if total else 0.0,
+        }
+    return delta
+
+
+def replay(
+    graph,
+    entries: list[dict],
+    concurrency: int,
+    speed: float | None = None,
+) -> dict:
+    """
+    Re-drives captured requests against `graph` and compares latency.
+
+    Each thread's requests run in their original order on one worker,
+    and up to `concurrency` threads are replayed at once. Without
+    `speed` they run as fast as possible. With `speed` set, a thread
+    is handed to the pool when its first request is due and every
+    request waits for its original arrival offset divided by `speed`
+    (1.0 = real time); how far requests start behind that schedule,
+    because the pool was full or an earlier turn was slow, is reported
+    as the schedule lag.
+    Single-flight hit rates are reported for the replay window.
+    """
+    threads = group_by_thread(entries)
+    stats_before = single_flight_stats()
+    origin = min(entry["started_at"] for entry in entries)
+    samples: list[dict] = []
+    lock = threading.Lock()
+
+    replay_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = []
+        for thread_entries in sorted(
+            threads.values(),
+            key=lambda thread_entries: thread_entries[0]["started_at"]
+        ):
+            if speed:
+                # Dispatch each thread when its first request is due
+                # rather than parking a worker per thread up front.
+                due = replay_started + (
+                    thread_entries[0]["started_at"] - origin
+                ) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            futures.append(executor.submit(
+                _replay_thread,
+                graph,
+                thread_entries,
+                origin,
+                replay_started,
+                speed,
+                samples,
+                lock,
+            ))
+        for future in futures:
+            future.result()
+    wall_seconds = time.perf_counter() - replay_started
+
+    captured_by_route: dict[str, list[float]] = {}
+    replayed_by_route: dict[str, list[float]] = {}
+    matching_routes = 0
+    for sample in samples:
+        captured = sample["captured"]
+        captured_by_route.setdefault(
+            captured.get("route") or "unknown", []
+        ).append(captured["latency_ms"] / 1000)
+
+        if not sample["ok"]:
+            continue
+        replayed_by_route.setdefault(
+            sample["route"] or "unknown", []
+        ).append(sample["latency_seconds"])
+        if sample["route"] == captured.get("route"):
+            matching_routes += 1
+
+    ok_samples = [sample for sample in samples if sample["ok"]]
+    return {
+        "single_flight": _stats_delta(stats_before, single_flight_stats()),
+        "requests": len(samples),
+        "threads": len(threads),
+        "concurrency": concurrency,
+        "speed": speed,
+        "wall_seconds": wall_seconds,
+        "schedule_lag_seconds": (
+            summarize([sample["lag_seconds"] for sample in samples])
+            if speed else None
+        ),
+        "errors": len(samples) - len(ok_samples),
+        "route_agreement": (
+            matching_routes / len(ok_samples) if ok_samples else 0.0
+        ),
+        "captured_latency_seconds": summarize([
+            sample["captured"]["latency_ms"] / 1000 for sample in samples
+        ]),
+        "replayed_latency_seconds": summarize([
+            sample["latency_seconds"] for sample in ok_samples
+        ]),
+        "captured_per_route_latency_seconds": {
+            route: summarize(values)
+            for route, values in sorted(captured_by_route.items())
+        },
+        "replayed_per_route_latency_seconds": {
+            route: summarize(values)
+            for route, values in sorted(replayed_by_route.items())
+        },
+    }
@@ -0,0 +1,84 @@
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+SCHEMA_VERSION = 1
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def build_report(config: dict, results: dict) -> dict:
+    """
+    Wraps benchmark results with the metadata needed to compare runs.
+    """
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "commit": _git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+
+
+def write_report(report: dict, output: Path) -> Path:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True))
+    return output
+
+
+def _flatten(value, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            flat.update(_flatten(child, f"{prefix}{key}."))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            # Keep list entries comparable across runs by their size key.
+            label = index
+            if isinstance(child, dict):
+                label = child.get(
+                    "collection_size",
+                    child.get("concurrency", index)
+                )
+            flat.update(_flatten(child, f"{prefix}{label}."))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix.rstrip(".")] = float(value)
+    return flat
+
+
+def compare_reports(base: dict, head: dict) -> list[dict]:
+    """
+    Returns one row per metric present in both reports.
+
+    Each row has the metric path, both values and the relative change.
+    """
+    base_metrics = _flatten(base["results"])
+    head_metrics = _flatten(head["results"])
+
+    rows = []
+    for metric in sorted(base_metrics.keys() & head_metrics.keys()):
+        before = base_metrics[metric]
+        after = head_metrics[metric]
+        change = (after - before) / before if before else None
+        rows.append({
+            "metric": metric,
+            "base": before,
+            "head": after,
+            "change": change,
+        })
+    return rows
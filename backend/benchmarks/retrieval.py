@@ -0,0 +1,100 @@
+import time
+from pathlib import Path
+
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.corpus import generate_chunks, generate_questions
+from utils.latency import summarize
+
+# Chroma rejects upserts above its max batch size (~5k records).
+ADD_BATCH_SIZE = 4000
+
+
+def build_collection(
+    persist_directory: Path,
+    embeddings: Embeddings,
+    size: int,
+    seed: int = 0,
+) -> tuple[Chroma, float]:
+    """
+    Fills a fresh collection with `size` synthetic chunks.
+
+    Returns the store and the seconds spent adding the chunks.
+    """
+    vector_store = Chroma(
+        collection_name=f"bench_{size}",
+        persist_directory=persist_directory.as_posix(),
+        embedding_function=embeddings,
+    )
+
+    started = time.perf_counter()
+    for start in range(0, size, ADD_BATCH_SIZE):
+        count = min(ADD_BATCH_SIZE, size - start)
+        texts = generate_chunks(count, seed=seed + start)
+        vector_store.add_texts(
+            texts,
+            metadatas=[
+                {"source": f"synthetic/{start + index}"}
+                for index in range(count)
+            ],
+            ids=[f"chunk-{start + index}" for index in range(count)],
+        )
+    build_seconds = time.perf_counter() - started
+
+    return vector_store, build_seconds
+
+
+def run_retrieval_scaling(
+    persist_directory: Path,
+    embeddings: Embeddings,
+    sizes: list[int],
+    queries: int,
+    k: int = 5,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Measures query latency against collections of increasing size.
+
+    Embedding and vector search are timed separately so the cost of
+    the index can be told apart from the cost of the model.
+    """
+    questions = generate_questions(queries, {"rag": 1.0}, seed=seed)
+    results = []
+
+    for size in sizes:
+        vector_store, build_seconds = build_collection(
+            persist_directory / f"size_{size}",
+            embeddings,
+            size,
+            seed=seed,
+        )
+
+        embed_latencies = []
+        search_latencies = []
+        for question in questions:
+            started = time.perf_counter()
+            vector = embeddings.embed_query(question)
+            embedded = time.perf_counter()
+            vector_store.similarity_search_by_vector(vector, k=k)
+            searched = time.perf_counter()
+
+            embed_latencies.append(embedded - started)
+            search_latencies.append(searched - embedded)
+
+        total_latencies = [
+            embed + search
+            for embed, search in zip(embed_latencies, search_latencies)
+        ]
+        results.append({
+            "collection_size": size,
+            "build_seconds": build_seconds,
+            "chunks_per_second": size / build_seconds if build_seconds else 0.0,
+            "embedding_latency_seconds": summarize(embed_latencies),
+            "search_latency_seconds": summarize(search_latencies),
+            "total_latency_seconds": summarize(total_latencies),
+        })
+
+        vector_store.delete_collection()
+
+    return results
@@ -0,0 +1,124 @@
+import contextlib
+import io
+import json
+import time
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.corpus import generate_labelled_corpus, generate_labelled_queries
+from benchmarks.fakes import use_vector_store
+from benchmarks.retrieval import ADD_BATCH_SIZE
+from utils.latency import summarize
+
+KB_QUERIES_PATH = Path(__file__).resolve().parent / "data" / "kb_queries.json"
+
+MODES = ("vector", "keyword", "hybrid")
+
+HASHING_WARNING = (
+    "Hashing embeddings: vector and hybrid recall do not reflect the "
+    "MiniLM model. Run with --embeddings model to compare modes."
+)
+
+
+def recall_at_k(retrieved_labels: list[str], relevant: list[str]) -> float:
+    """
+    Share of a query's relevant labels found among its retrieved chunks.
+    """
+    return len(set(relevant) & set(retrieved_labels)) / len(relevant)
+
+
+def evaluate_modes(queries: list[dict], k: int = 5) -> dict:
+    """
+    Runs every labelled query through each retrieval mode against the
+    active index and reports latency and recall@k per mode.
+
+    A chunk is relevant when its `source` metadata is one of the
+    query's labels.
+    """
+    from rag.lexical_index import get_lexical_index
+    from rag.retriever import retrieve_documents
+    from rag.vector_store import get_index
+
+    # Build or load the lexical index outside the timed section.
+    get_lexical_index(get_index())
+
+    results = {}
+    for mode in MODES:
+        latencies = []
+        recalls = []
+        for query in queries:
+            started = time.perf_counter()
+            documents = retrieve_documents(query["query"], k=k, mode=mode)
+            latencies.append(time.perf_counter() - started)
+            recalls.append(recall_at_k(
+                [document.metadata.get("source") for document in documents],
+                query["labels"]
+            ))
+
+        results[mode] = {
+            "latency_seconds": summarize(latencies),
+            f"recall_at_{k}": sum(recalls) / len(recalls) if recalls else 0.0,
+        }
+    return results
+
+
+def run_retrieval_quality(
+    workdir: Path,
+    embeddings: Embeddings,
+    embeddings_name: str,
+    dataset: str,
+    corpus_size: int,
+    queries: int,
+    k: int = 5,
+    seed: int = 0,
+) -> dict:
+    """
+    Compares vector, keyword and hybrid retrieval on a labelled set.
+
+    Vector and hybrid recall only mean something with the real
+    embedding model; with the hashing stub the result carries a
+    warning.
+
+    Args:
+        embeddings_name: "model" or "hashing", recorded in the result.
+        dataset: "synthetic" for generated chunks labelled by crop and
+            topic, or "kb" to ingest knowledge_base/raw and use the
+            source-labelled questions in data/kb_queries.json.
+    """
+    use_vector_store(workdir / "quality_chroma", embeddings)
+
+    if dataset == "kb":
+        from rag.ingest import ingest
+
+        # ingest() reports progress with print; keep the output clean.
+        with contextlib.redirect_stdout(io.StringIO()):
+            ingest()
+        labelled_queries = json.loads(KB_QUERIES_PATH.read_text())
+    else:
+        from rag.vector_store import get_vector_store
+
+        chunks, labels = generate_labelled_corpus(corpus_size, seed=seed)
+        for start in range(0, len(chunks), ADD_BATCH_SIZE):
+            get_vector_store().add_texts(
+                chunks[start:start + ADD_BATCH_SIZE],
+                metadatas=[
+                    {"source": label}
+                    for label in labels[start:start + ADD_BATCH_SIZE]
+                ],
+            )
+        labelled_queries = generate_labelled_queries(
+            queries,
+            set(labels),
+            seed=seed
+        )
+
+    result = {
+        "dataset": dataset,
+        "embeddings": embeddings_name,
+        "queries": len(labelled_queries),
+        "modes": evaluate_modes(labelled_queries, k=k),
+    }
+    if embeddings_name != "model":
+        result["warning"] = HASHING_WARNING
+    return result
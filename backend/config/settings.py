@@ -7,4 +7,84 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise ValueError("Groq api key is missing")
 
-HF_TOKEN = os.getenv("HF_TOKEN")
\ No newline at end of file
+HF_TOKEN = os.getenv("HF_TOKEN")
+
+# Traffic capture
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() == "true"
+CAPTURE_PATH = os.getenv("CAPTURE_PATH", "traffic/requests.jsonl")
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", 50 * 1024 * 1024))
+CAPTURE_BACKUP_COUNT = int(os.getenv("CAPTURE_BACKUP_COUNT", 5))
+
+# Batch chat
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 100))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+RETRIEVAL_BATCH_MAX_SIZE = int(os.getenv("RETRIEVAL_BATCH_MAX_SIZE", 32))
+RETRIEVAL_BATCH_MAX_WAIT_MS = float(os.getenv("RETRIEVAL_BATCH_MAX_WAIT_MS", 2000))
+
+# Retrieval
+# vector: embedding similarity; keyword: BM25 only; hybrid: both, fused.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Results taken from each ranking before fusion.
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", 20))
+RETRIEVAL_RRF_K = int(os.getenv("RETRIEVAL_RRF_K", 60))
+# First-turn questions of at most this many words skip the query
+# rewriter and the embedding pass and are answered from BM25 results.
+KEYWORD_FAST_PATH_ENABLED = os.getenv("KEYWORD_FAST_PATH_ENABLED", "true").lower() == "true"
+KEYWORD_FAST_PATH_MAX_WORDS = int(os.getenv("KEYWORD_FAST_PATH_MAX_WORDS", 4))
+
+# Request coalescing
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Knowledge base index
+# Re-ingest knowledge_base/raw in the API process when it changes.
+KB_WATCH_ENABLED = os.getenv("KB_WATCH_ENABLED", "false").lower() == "true"
+KB_WATCH_POLL_SECONDS = float(os.getenv("KB_WATCH_POLL_SECONDS", 2))
+KB_WATCH_DEBOUNCE_SECONDS = float(os.getenv("KB_WATCH_DEBOUNCE_SECONDS", 5))
+# Index versions kept on disk, including the active one.
+KB_KEEP_VERSIONS = int(os.getenv("KB_KEEP_VERSIONS", 2))
+# How often readers look for an index activated by another process.
+KB_INDEX_CHECK_SECONDS = float(os.getenv("KB_INDEX_CHECK_SECONDS", 2))
+
+# LLM client and scheduler
+GROQ_API_BASE = os.getenv("GROQ_API_BASE")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 12000))
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", 300))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 20))
+
+# Prompt token budgets per node (system prompt included)
+PROMPT_MAX_TOKENS_ROUTER = int(os.getenv("PROMPT_MAX_TOKENS_ROUTER", 1500))
+PROMPT_MAX_TOKENS_QUERY_REWRITER = int(os.getenv("PROMPT_MAX_TOKENS_QUERY_REWRITER", 1000))
+PROMPT_MAX_TOKENS_CALCULATOR = int(os.getenv("PROMPT_MAX_TOKENS_CALCULATOR", 1200))
+PROMPT_MAX_TOKENS_RAG = int(os.getenv("PROMPT_MAX_TOKENS_RAG", 2500))
+PROMPT_MAX_TOKENS_CHATBOT = int(os.getenv("PROMPT_MAX_TOKENS_CHATBOT", 2500))
+
+# Hedged generation requests
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", 0.05))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", 0.5))
+LLM_HEDGE_FALLBACK_MODEL = os.getenv("LLM_HEDGE_FALLBACK_MODEL")
+
+# Admission control
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 32))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 64))
+ADMISSION_PER_USER_LIMIT = int(os.getenv("ADMISSION_PER_USER_LIMIT", 4))
+ADMISSION_PER_THREAD_MAX_PENDING = int(os.getenv("ADMISSION_PER_THREAD_MAX_PENDING", 2))
+ADMISSION_RETRY_AFTER_SECONDS = float(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 2))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", 120))
+
+# Request profiling
+# Lets clients ask for a profile with `X-Profile: true` or `?profile=true`.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Also profile one request in every N (0 disables sampling).
+PROFILING_SAMPLE_EVERY_N = int(os.getenv("PROFILING_SAMPLE_EVERY_N", 0))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_TOP_FUNCTIONS = int(os.getenv("PROFILING_TOP_FUNCTIONS", 25))
@@ -1,10 +1,104 @@
-from fastapi import FastAPI
-from api.chat import ChatRequest, ChatResponse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import contextvars
+import functools
+import math
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from api.admission import AdmissionRejected, get_admission_controller
+from api.chat import (
+    ChatRequest,
+    ChatResponse,
+    ChatBatchRequest,
+    ChatBatchItem,
+    ChatBatchResponse,
+)
 from langchain_core.messages import (HumanMessage,AIMessage)
 from agent.graph_builder import graph
+from config.settings import (
+    ADMISSION_MAX_IN_FLIGHT,
+    BATCH_MAX_ITEMS,
+    BATCH_MAX_CONCURRENCY,
+    ADMISSION_RETRY_AFTER_SECONDS,
+    REQUEST_TIMEOUT_SECONDS,
+    PROFILING_ENABLED,
+    PROFILING_TOP_FUNCTIONS,
+)
+from model.groq_client import llm, generation_llm
+from rag.batch_retriever import RetrievalBatcher, create_retrieval_batcher
+from rag.kb_watcher import get_kb_watcher
+from rag.vector_store import get_index_version
+from model.scheduler import LLMQueueTimeout
+from prompts.builder import prompt_stats
 from utils.message_utils import get_latest_message
+from utils.profiling import (
+    RequestProfile,
+    get_profile_directory,
+    get_profile_sampler,
+    run_profiled,
+)
+from utils.single_flight import single_flight_stats
+from utils.traffic_capture import get_traffic_recorder
+
+
+# Graph runs block on the LLM, so they get their own threads instead of
+# the default executor, sized for every admitted request plus a batch.
+chat_executor = ThreadPoolExecutor(
+    max_workers=ADMISSION_MAX_IN_FLIGHT + BATCH_MAX_CONCURRENCY,
+    thread_name_prefix="chat"
+)
+
+
+async def run_in_chat_executor(function, *args, **kwargs):
+    """
+    Like asyncio.to_thread, on chat_executor.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        chat_executor,
+        functools.partial(context.run, function, *args, **kwargs)
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    recorder = get_traffic_recorder()
+    watcher = get_kb_watcher()
+    if watcher is not None:
+        watcher.start()
+    yield
+    if watcher is not None:
+        watcher.stop()
+    if recorder is not None:
+        recorder.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    headers = None
+    if exc.retry_after:
+        headers = {"Retry-After": str(math.ceil(exc.retry_after))}
+
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=headers
+    )
+
+
+@app.exception_handler(LLMQueueTimeout)
+async def llm_queue_timeout_handler(request: Request, exc: LLMQueueTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The assistant is busy. Please retry later."},
+        headers={"Retry-After": str(math.ceil(ADMISSION_RETRY_AFTER_SECONDS))}
+    )
 
 @app.get('/health')
 def health_check():
@@ -14,10 +108,246 @@ def health_check():
         "version": "1.0.0"
     }
 
-@app.post('/chat')
-async def chat(request: ChatRequest) -> ChatResponse:
+@app.get('/metrics')
+def metrics():
+    watcher = get_kb_watcher()
+    return {
+        "admission": get_admission_controller().metrics(),
+        "llm": llm.metrics(),
+        "hedging": generation_llm.metrics(),
+        "single_flight": single_flight_stats(),
+        "prompts": prompt_stats(),
+        "knowledge_base": {
+            "index_version": get_index_version(),
+            "watcher": watcher.metrics() if watcher else None
+        }
+    }
+
+@app.post('/chat', response_model_exclude_none=True)
+async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
     print(request.model_dump())
-    
+
+    deadline = request_deadline(http_request)
+    profile, return_profile = request_profile(request, http_request)
+    async with get_admission_controller().admit(
+        request.user_id,
+        request.thread_id,
+        deadline
+    ):
+        # The client may have hung up while the request was queued.
+        if await http_request.is_disconnected():
+            raise AdmissionRejected(499, "Client closed the request.")
+
+        # Run the graph off the event loop so concurrent requests overlap
+        # and identical in-flight questions can be coalesced.
+        answer = await run_in_chat_executor(
+            run_chat,
+            request,
+            deadline=deadline,
+            profile=profile
+        )
+    print(answer)
+
+    return ChatResponse(
+    status="success",
+    answer=answer,
+    thread_id=request.thread_id,
+    profile=(
+        profile.summary(PROFILING_TOP_FUNCTIONS) if return_profile else None
+    )
+    )
+
+
+@app.post('/chat/batch')
+async def chat_batch(
+    batch: ChatBatchRequest,
+    http_request: Request,
+) -> ChatBatchResponse:
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {BATCH_MAX_ITEMS} requests."
+        )
+
+    concurrency = min(
+        batch.max_concurrency or BATCH_MAX_CONCURRENCY,
+        BATCH_MAX_CONCURRENCY
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[ChatBatchItem | None] = [None] * len(batch.requests)
+    admission = get_admission_controller()
+    deadline = request_deadline(http_request)
+
+    # Keep a batch within the per-user limit so its own items queue
+    # here instead of being rejected by admission control.
+    user_slots: dict[str, asyncio.Semaphore] = {}
+    for request in batch.requests:
+        user_slots.setdefault(
+            request.user_id,
+            asyncio.Semaphore(admission.per_user_limit)
+        )
+
+    # Items of the same thread run in order; threads run concurrently.
+    # The batch's RAG items share embedding and vector search work.
+    batcher = create_retrieval_batcher()
+    threads: dict[str, list[tuple[int, ChatRequest]]] = {}
+    for index, request in enumerate(batch.requests):
+        threads.setdefault(request.thread_id, []).append((index, request))
+
+    async def run_thread(items: list[tuple[int, ChatRequest]]) -> None:
+        for index, request in items:
+            async with semaphore, user_slots[request.user_id]:
+                try:
+                    async with admission.admit(
+                        request.user_id,
+                        request.thread_id,
+                        deadline
+                    ):
+                        results[index] = await run_in_chat_executor(
+                            run_batch_item,
+                            index,
+                            request,
+                            deadline,
+                            batcher
+                        )
+                except AdmissionRejected as exc:
+                    results[index] = ChatBatchItem(
+                        index=index,
+                        status="error",
+                        thread_id=request.thread_id,
+                        error=exc.detail
+                    )
+
+    await asyncio.gather(*(
+        run_thread(items) for items in threads.values()
+    ))
+
+    failures = sum(1 for item in results if item.status != "success")
+    if failures == 0:
+        status = "success"
+    elif failures == len(results):
+        status = "error"
+    else:
+        status = "partial"
+
+    return ChatBatchResponse(
+        status=status,
+        results=results
+    )
+
+
+def run_batch_item(
+    index: int,
+    request: ChatRequest,
+    deadline: float,
+    batcher: RetrievalBatcher,
+) -> ChatBatchItem:
+    batcher.join(request.thread_id)
+    try:
+        answer = run_chat(
+            request,
+            batch=True,
+            deadline=deadline,
+            retrieval_batcher=batcher
+        )
+    except Exception as exc:
+        return ChatBatchItem(
+            index=index,
+            status="error",
+            thread_id=request.thread_id,
+            error=str(exc) or type(exc).__name__
+        )
+    finally:
+        batcher.leave(request.thread_id)
+
+    return ChatBatchItem(
+        index=index,
+        status="success",
+        thread_id=request.thread_id,
+        answer=answer
+    )
+
+
+def request_deadline(http_request: Request) -> float:
+    """
+    Returns the monotonic time after which the client stops waiting.
+
+    Clients can send `X-Request-Timeout` (seconds from now) or
+    `X-Request-Deadline` (Unix timestamp); otherwise the server's
+    REQUEST_TIMEOUT_SECONDS applies.
+    """
+    timeout = REQUEST_TIMEOUT_SECONDS
+    try:
+        if "x-request-timeout" in http_request.headers:
+            timeout = float(http_request.headers["x-request-timeout"])
+        elif "x-request-deadline" in http_request.headers:
+            timeout = (
+                float(http_request.headers["x-request-deadline"])
+                - time.time()
+            )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid request timeout or deadline header."
+        )
+
+    return time.monotonic() + min(timeout, REQUEST_TIMEOUT_SECONDS)
+
+
+def request_profile(
+    request: ChatRequest,
+    http_request: Request,
+) -> tuple[RequestProfile | None, bool]:
+    """
+    Decides whether a request is profiled.
+
+    With PROFILING_ENABLED, clients opt in with an `X-Profile: true`
+    header or `?profile=true` and get the breakdown in the response.
+    Independently, one request in every PROFILING_SAMPLE_EVERY_N is
+    profiled and only written to PROFILING_DIR.
+
+    Returns:
+        The profile to record into (None if not profiled) and whether
+        to return it to the client.
+    """
+    flag = (
+        http_request.headers.get("x-profile")
+        or http_request.query_params.get("profile")
+        or ""
+    )
+    requested = PROFILING_ENABLED and flag.lower() in ("1", "true", "yes")
+
+    if not requested and not get_profile_sampler().should_sample():
+        return None, False
+
+    profile = RequestProfile({
+        "thread_id": request.thread_id,
+        "user_id": request.user_id,
+        "sampled": not requested,
+    })
+    return profile, requested
+
+
+def run_chat(
+    request: ChatRequest,
+    batch: bool = False,
+    deadline: float | None = None,
+    profile: RequestProfile | None = None,
+    retrieval_batcher: RetrievalBatcher | None = None,
+) -> str:
+    """
+    Runs one chat turn through the graph and returns the answer.
+
+    Args:
+        request: The chat request.
+        batch: The request is a batch item. It yields the LLM to
+            interactive requests.
+        deadline: Monotonic time after which no LLM call is started.
+        profile: Records a timing breakdown of the run when given; it
+            is also written to PROFILING_DIR.
+        retrieval_batcher: The batcher through which a batch item
+            shares retrieval work with the other items of its batch.
+    """
     state = {
         "messages": [
             HumanMessage(content=request.question)
@@ -27,23 +357,78 @@ async def chat(request: ChatRequest) -> ChatResponse:
     config = {
         "configurable":{
             "thread_id": request.thread_id,
-            "user_id": request.user_id
+            "user_id": request.user_id,
+            "retrieval_batcher": retrieval_batcher,
+            "background": batch,
+            "deadline": deadline
         }
     }
 
-    final_state = graph.invoke(
-        state,
-        config=config
+    started_at = time.time()
+    started = time.perf_counter()
+    final_state = None
+    answer = ""
+    status = "error"
+    try:
+        if profile is None:
+            final_state = graph.invoke(
+                state,
+                config=config
+                )
+        else:
+            final_state = run_profiled(
+                profile,
+                graph.invoke,
+                state,
+                config=config
+            )
+
+        response = get_latest_message(
+            final_state["messages"],
+            AIMessage
+        )
+        answer = response.content
+        status = "success"
+    finally:
+        capture_request(
+            request,
+            route=final_state.get("route") if final_state else None,
+            started_at=started_at,
+            latency_seconds=time.perf_counter() - started,
+            answer=answer,
+            status=status,
         )
+        if profile is not None:
+            try:
+                path = profile.save(
+                    get_profile_directory(),
+                    PROFILING_TOP_FUNCTIONS
+                )
+                print(f"Profile written to {path}")
+            except Exception as exc:
+                print(f"Failed to write profile: {exc}")
 
-    response = get_latest_message(
-        final_state["messages"],
-        AIMessage
-    )
-    print(response.content)
-    
-    return ChatResponse(
-    status="success",
-    answer=response.content,
-    thread_id=request.thread_id
-    )
\ No newline at end of file
+    return answer
+
+
+def capture_request(
+    request: ChatRequest,
+    route: str | None,
+    started_at: float,
+    latency_seconds: float,
+    answer: str,
+    status: str,
+) -> None:
+    recorder = get_traffic_recorder()
+    if recorder is None:
+        return
+
+    recorder.record({
+        **request.model_dump(),
+        "route": route,
+        "status": status,
+        "started_at": started_at,
+        "latency_ms": round(latency_seconds * 1000, 3),
+        "response_chars": len(answer),
+        "response_bytes": len(answer.encode("utf-8")),
+    })
@@ -1,12 +1,78 @@
 from langchain_groq import ChatGroq
-from config.settings import GROQ_API_KEY
+from config.settings import (
+    GROQ_API_KEY,
+    GROQ_API_BASE,
+    LLM_MODEL,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_EXPECTED_OUTPUT_TOKENS,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_BUDGET,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MIN_DELAY_SECONDS,
+    LLM_HEDGE_FALLBACK_MODEL,
+)
+from model.hedging import HedgedLLM
+from model.scheduler import LLMScheduler
 
-def get_llm():
+def get_llm(model: str = LLM_MODEL):
+    # Retries are handled by the scheduler, which honors Retry-After
+    # across all callers instead of per request.
     return ChatGroq(
         api_key=GROQ_API_KEY,
-        model="llama-3.3-70b-versatile",
+        base_url=GROQ_API_BASE,
+        model=model,
         temperature=0.7,
         max_tokens=1000,
+        timeout=LLM_TIMEOUT_SECONDS,
+        max_retries=0,
     )
-llm = get_llm()
 
+
+def schedule(chat_model) -> LLMScheduler:
+    return LLMScheduler(
+        chat_model,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+        expected_output_tokens=LLM_EXPECTED_OUTPUT_TOKENS,
+        queue_timeout_seconds=LLM_QUEUE_TIMEOUT_SECONDS,
+        max_retries=LLM_MAX_RETRIES,
+        backoff_base_seconds=LLM_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=LLM_BACKOFF_MAX_SECONDS,
+    )
+
+
+def hedge(
+    primary: LLMScheduler,
+    fallback: LLMScheduler | None = None,
+    enabled: bool = LLM_HEDGE_ENABLED,
+) -> HedgedLLM:
+    return HedgedLLM(
+        primary,
+        fallback=fallback,
+        enabled=enabled,
+        hedge_percentile=LLM_HEDGE_PERCENTILE,
+        budget=LLM_HEDGE_BUDGET,
+        min_samples=LLM_HEDGE_MIN_SAMPLES,
+        min_delay_seconds=LLM_HEDGE_MIN_DELAY_SECONDS,
+    )
+
+llm = schedule(get_llm())
+
+# Used for the final answer only; hedging the short routing and
+# rewriting calls would spend budget where the tail is not.
+generation_llm = hedge(
+    llm,
+    fallback=(
+        schedule(get_llm(LLM_HEDGE_FALLBACK_MODEL))
+        if LLM_HEDGE_FALLBACK_MODEL else None
+    ),
+)
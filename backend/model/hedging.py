@@ -0,0 +1,197 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeout,
+    wait,
+)
+
+from model.scheduler import Priority
+from utils.latency import percentile, summarize
+
+
+class HedgedLLM:
+    """
+    Sends a duplicate request when the first one is unusually slow.
+
+    If a call has not returned after the `hedge_percentile` of recent
+    primary latencies, a second call is fired (to `fallback` if given,
+    else the same model) and whichever finishes first wins. Hedges are
+    capped at `budget` extra calls per call made.
+
+    Python threads cannot be interrupted, so the losing call is only
+    cancelled while it is still queued, in the executor or in the
+    scheduler, where it gives up its place without using a slot or
+    rate limit budget; once sent to the model it runs to completion in
+    the background and its result is discarded.
+    """
+
+    def __init__(
+        self,
+        primary,
+        fallback=None,
+        enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        budget: float = 0.05,
+        min_samples: int = 20,
+        min_delay_seconds: float = 0.5,
+        max_workers: int = 64,
+        window: int = 500,
+    ):
+        self.primary = primary
+        self.fallback = fallback
+        self.enabled = enabled
+        self.hedge_percentile = hedge_percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay_seconds = min_delay_seconds
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="llm-hedge"
+        )
+        self._lock = threading.Lock()
+        self._primary_latencies: deque[float] = deque(maxlen=window)
+        self._effective_latencies: deque[float] = deque(maxlen=window)
+        self._calls = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+
+    def invoke(
+        self,
+        input,
+        priority: Priority = Priority.INTERACTIVE,
+        **kwargs
+    ):
+        if not self.enabled:
+            return self.primary.invoke(input, priority=priority, **kwargs)
+
+        started = time.perf_counter()
+        with self._lock:
+            self._calls += 1
+
+        # Set once either attempt succeeds; the other then leaves the
+        # scheduler queue instead of using a slot.
+        cancel = threading.Event()
+        primary = self._submit(
+            self.primary,
+            input,
+            priority,
+            kwargs,
+            cancel
+        )
+        primary.add_done_callback(
+            lambda future: self._record_primary(future, started)
+        )
+
+        delay = self._hedge_delay()
+        try:
+            response = primary.result(timeout=delay)
+        except FutureTimeout:
+            response = self._hedge(
+                primary,
+                cancel,
+                input,
+                priority,
+                kwargs
+            )
+
+        with self._lock:
+            self._effective_latencies.append(
+                time.perf_counter() - started
+            )
+        return response
+
+    def _submit(self, model, input, priority, kwargs, cancel):
+        # Carry the caller's context (e.g. an active profile) along.
+        context = contextvars.copy_context()
+        return self._executor.submit(
+            context.run,
+            model.invoke,
+            input,
+            priority=priority,
+            cancel=cancel,
+            **kwargs
+        )
+
+    def _hedge(self, primary, cancel, input, priority, kwargs):
+        if not self._take_budget():
+            return primary.result()
+
+        hedge_model = self.fallback or self.primary
+        hedge = self._submit(
+            hedge_model,
+            input,
+            priority,
+            kwargs,
+            cancel
+        )
+        models = {primary: self.primary, hedge: hedge_model}
+        pending = {primary, hedge}
+        first_error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    first_error = first_error or future.exception()
+                    continue
+
+                for loser in pending:
+                    loser.cancel()
+                    models[loser].cancel(cancel)
+                if future is hedge:
+                    with self._lock:
+                        self._hedge_wins += 1
+                return future.result()
+
+        raise first_error
+
+    def _hedge_delay(self) -> float | None:
+        with self._lock:
+            if len(self._primary_latencies) < self.min_samples:
+                return None
+            threshold = percentile(
+                list(self._primary_latencies),
+                self.hedge_percentile
+            )
+        return max(threshold, self.min_delay_seconds)
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.budget * self._calls:
+                return False
+            self._hedges += 1
+            return True
+
+    def _record_primary(self, future, started: float) -> None:
+        # Primary latencies include calls that lost to a hedge: they are
+        # what every call would have cost without hedging.
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._primary_latencies.append(time.perf_counter() - started)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            primary = summarize(list(self._primary_latencies))
+            effective = summarize(list(self._effective_latencies))
+            calls = self._calls
+            hedges = self._hedges
+            hedge_wins = self._hedge_wins
+
+        return {
+            "enabled": self.enabled,
+            "calls": calls,
+            "hedges": hedges,
+            "hedge_rate": hedges / calls if calls else 0.0,
+            "hedge_wins": hedge_wins,
+            "budget": self.budget,
+            "hedge_delay_seconds": self._hedge_delay(),
+            "primary_latency_seconds": primary,
+            "effective_latency_seconds": effective,
+            "p99_improvement_seconds": primary["p99"] - effective["p99"],
+        }
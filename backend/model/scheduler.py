@@ -0,0 +1,546 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+
+from utils.latency import summarize
+from utils.profiling import span
+from utils.tokens import estimate_prompt_tokens
+
+# Status codes worth retrying: timeouts, conflicts, rate limits, 5xx.
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+RETRYABLE_ERROR_NAMES = {
+    "APITimeoutError",
+    "APIConnectionError",
+    "TimeoutError",
+}
+
+# The request rate learned from 429s grows by this many requests per
+# minute with every success and is halved by every 429.
+ADAPTIVE_RATE_INCREASE = 1.0
+ADAPTIVE_RATE_DECREASE = 0.5
+MIN_RETRY_AFTER_SECONDS = 0.01
+
+
+class Priority(IntEnum):
+    """
+    Lower values are served first.
+
+    INTERACTIVE is the final answer of a request that is already being
+    worked on; STANDARD covers routing, rewriting and extraction calls;
+    BACKGROUND is bulk traffic such as batch items.
+    """
+
+    INTERACTIVE = 0
+    STANDARD = 1
+    BACKGROUND = 2
+
+
+class LLMQueueTimeout(TimeoutError):
+    """
+    Raised when a call waits in the scheduler queue past its deadline.
+    """
+
+
+class LLMCallCancelled(Exception):
+    """
+    Raised when a call is cancelled before it reached the model.
+    """
+
+
+class CallGroup:
+    """
+    Priority and deadline of an LLM call made on behalf of several
+    callers, e.g. the ones SingleFlight collapses into one call.
+
+    The call is as urgent as its most urgent caller and runs until the
+    last caller's deadline. Callers that join while it is queued move
+    it up the queue and extend its deadline.
+    """
+
+    def __init__(
+        self,
+        priority: Priority = Priority.STANDARD,
+        deadline: float | None = None,
+    ):
+        self.priority = priority
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._waiters: list[threading.Condition] = []
+
+    def join(self, other: "CallGroup") -> None:
+        with self._lock:
+            self.priority = min(self.priority, other.priority)
+            # No deadline is the latest deadline.
+            if self.deadline is not None:
+                self.deadline = (
+                    None if other.deadline is None
+                    else max(self.deadline, other.deadline)
+                )
+            waiters = list(self._waiters)
+
+        # Queued calls re-read the group when woken.
+        for condition in waiters:
+            with condition:
+                condition.notify_all()
+
+    def deadline_before(self, limit: float) -> float:
+        with self._lock:
+            if self.deadline is None:
+                return limit
+            return min(self.deadline, limit)
+
+    def _watch(self, condition: threading.Condition) -> None:
+        with self._lock:
+            self._waiters.append(condition)
+
+    def _unwatch(self, condition: threading.Condition) -> None:
+        with self._lock:
+            self._waiters.remove(condition)
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units evenly over a minute, up to `per_minute`.
+
+    The balance may go negative when a call turns out to use more
+    tokens than estimated; later calls then wait for the debt.
+    `capacity` caps bursts below a full minute's worth.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.capacity = float(capacity or per_minute)
+        self.rate = per_minute / 60
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A single call larger than the bucket only waits for a full one.
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def drain(self, now: float) -> None:
+        """
+        Empties the bucket, so callers resume at its refill rate.
+        """
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+def _status_code(exc: Exception) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(float(headers.get("retry-after")), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    return type(exc).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class LLMScheduler:
+    """
+    Client-side scheduler in front of a chat model.
+
+    Every call waits for a concurrency slot and for room in the
+    requests-per-minute and tokens-per-minute buckets, in priority
+    order. Rate limits and transient failures are retried with full
+    jitter exponential backoff; a Retry-After from the provider pauses
+    all callers, not just the one that was rejected.
+
+    After a 429 callers do not resume all at once: the request buckets
+    are drained and a request rate is learned, additive increase and
+    multiplicative decrease, starting at one call per Retry-After
+    interval, so a client whose configured rate is too high (or unset)
+    settles near the provider's limit.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_concurrency: int,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        expected_output_tokens: int = 0,
+        queue_timeout_seconds: float = 60.0,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 20.0,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.expected_output_tokens = expected_output_tokens
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        # A limit of 0 disables that bucket.
+        self._request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        # Learned from Retry-After; one call at a time, no bursts.
+        self._adaptive_bucket: TokenBucket | None = None
+
+        self._condition = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+
+        self._counters = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "queue_timeouts": 0,
+            "cancelled": 0,
+        }
+        self._max_queue_depth = 0
+        self._queue_waits: deque[float] = deque(maxlen=1000)
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    def invoke(
+        self,
+        input,
+        priority: Priority = Priority.STANDARD,
+        deadline: float | None = None,
+        cancel: threading.Event | None = None,
+        group: CallGroup | None = None,
+        **kwargs
+    ):
+        """
+        Calls the model through the scheduler.
+
+        Args:
+            input: Prompt string or list of messages.
+            priority: Queue priority of this call.
+            deadline: Monotonic time after which the caller no longer
+                needs the answer; the call is not started after it.
+                The queue timeout applies as well.
+            cancel: Shared by alternative calls for the same answer,
+                such as a hedged call and its duplicate. It is set when
+                one of them succeeds, or through `cancel()`; a call
+                still queued or backing off then gives up its place and
+                raises LLMCallCancelled. A call already sent to the
+                model runs to completion.
+            group: Shared priority and deadline of a call made for
+                several callers; replaces `priority` and `deadline`.
+        """
+        if group is None:
+            group = CallGroup(priority, deadline)
+        queue_deadline = time.monotonic() + self.queue_timeout_seconds
+
+        estimated_tokens = (
+            estimate_prompt_tokens(input) + self.expected_output_tokens
+        )
+        with self._condition:
+            self._counters["calls"] += 1
+
+        attempt = 0
+        while True:
+            with span("llm_queue", group.priority.name.lower()):
+                self._acquire(group, estimated_tokens, queue_deadline, cancel)
+            started = time.perf_counter()
+            try:
+                with span("llm_call", group.priority.name.lower()):
+                    response = self.model.invoke(input, **kwargs)
+            except Exception as exc:
+                self._release()
+                if not is_retryable(exc) or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+
+                delay = self._backoff(exc, attempt)
+                if time.monotonic() + delay >= group.deadline_before(
+                    queue_deadline
+                ):
+                    self._count("failed")
+                    raise
+                attempt += 1
+                self._count("retries")
+                with span("llm_backoff"):
+                    if cancel is not None:
+                        cancel.wait(delay)
+                    else:
+                        time.sleep(delay)
+                continue
+
+            # Before the slot is released, so an alternative call
+            # queued behind this one cannot take it.
+            if cancel is not None:
+                cancel.set()
+
+            # Settle the token bucket against the reported usage.
+            actual_tokens = self._actual_tokens(response)
+            self._release(
+                latency=time.perf_counter() - started,
+                token_correction=(
+                    actual_tokens - estimated_tokens if actual_tokens else 0
+                ),
+            )
+            self._count("succeeded")
+            return response
+
+    def _acquire(
+        self,
+        group: CallGroup,
+        tokens: int,
+        queue_deadline: float,
+        cancel: threading.Event | None = None,
+    ) -> None:
+        queued = time.monotonic()
+        sequence = next(self._sequence)
+        ticket = (int(group.priority), sequence)
+
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._max_queue_depth = max(
+                self._max_queue_depth,
+                len(self._waiting)
+            )
+            group._watch(self._condition)
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        self._counters["cancelled"] += 1
+                        raise LLMCallCancelled(
+                            "LLM call cancelled while queued."
+                        )
+
+                    # A caller that joined the group may have raised
+                    # its priority.
+                    if group.priority < ticket[0]:
+                        self._waiting.remove(ticket)
+                        ticket = (int(group.priority), sequence)
+                        self._waiting.append(ticket)
+                        heapq.heapify(self._waiting)
+
+                    now = time.monotonic()
+                    remaining = group.deadline_before(queue_deadline) - now
+                    if remaining <= 0:
+                        self._counters["queue_timeouts"] += 1
+                        raise LLMQueueTimeout(
+                            "Timed out waiting for LLM capacity."
+                        )
+
+                    wait = None
+                    if (
+                        self._waiting[0] == ticket
+                        and self._in_flight < self.max_concurrency
+                    ):
+                        wait = self._wait_time(tokens, now)
+                        if wait <= 0:
+                            break
+
+                    self._condition.wait(
+                        min(wait, remaining) if wait else remaining
+                    )
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+                raise
+            finally:
+                group._unwatch(self._condition)
+
+            heapq.heappop(self._waiting)
+            if self._request_bucket:
+                self._request_bucket.consume(1)
+            if self._adaptive_bucket:
+                self._adaptive_bucket.consume(1)
+            if self._token_bucket:
+                self._token_bucket.consume(tokens)
+            self._in_flight += 1
+            self._queue_waits.append(time.monotonic() - queued)
+            # The next caller in line may be able to start as well.
+            self._condition.notify_all()
+
+    def cancel(self, event: threading.Event) -> None:
+        """
+        Cancels the calls made with `cancel=event` that have not
+        reached the model yet.
+        """
+        event.set()
+        # Wake queued callers so the cancelled one drops its ticket.
+        with self._condition:
+            self._condition.notify_all()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        waits = [self._blocked_until - now]
+        if self._request_bucket:
+            waits.append(self._request_bucket.wait_time(1, now))
+        if self._adaptive_bucket:
+            waits.append(self._adaptive_bucket.wait_time(1, now))
+        if self._token_bucket:
+            waits.append(self._token_bucket.wait_time(tokens, now))
+        return max(waits)
+
+    def _release(
+        self,
+        latency: float | None = None,
+        token_correction: int = 0,
+    ) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if latency is not None:
+                self._latencies.append(latency)
+                if self._adaptive_bucket:
+                    self._adaptive_bucket.rate += ADAPTIVE_RATE_INCREASE / 60
+            if self._token_bucket and token_correction:
+                self._token_bucket.consume(token_correction)
+            self._condition.notify_all()
+
+    def _backoff(self, exc: Exception, attempt: int) -> float:
+        retry_after = _retry_after(exc)
+        if _status_code(exc) == 429:
+            self._count("rate_limited")
+
+        if retry_after is not None:
+            # Provider told us when to come back: hold every caller.
+            with self._condition:
+                now = time.monotonic()
+                # Calls already in flight when the pause began were
+                # sent at the old rate; slow down once per pause.
+                if now >= self._blocked_until:
+                    self._throttle(retry_after, now)
+                self._blocked_until = max(
+                    self._blocked_until,
+                    now + retry_after
+                )
+            return retry_after + random.uniform(0, self.backoff_base_seconds)
+
+        ceiling = min(
+            self.backoff_max_seconds,
+            self.backoff_base_seconds * 2 ** attempt
+        )
+        return random.uniform(0, ceiling)
+
+    def _throttle(self, retry_after: float, now: float) -> None:
+        # Resume one call per Retry-After interval instead of releasing
+        # every waiting caller when the pause ends.
+        per_minute = 60 / max(retry_after, MIN_RETRY_AFTER_SECONDS)
+        if self._adaptive_bucket is not None:
+            per_minute = min(
+                per_minute,
+                self._adaptive_bucket.rate * 60 * ADAPTIVE_RATE_DECREASE
+            )
+        self._adaptive_bucket = TokenBucket(per_minute, capacity=1)
+        self._adaptive_bucket.drain(now)
+        if self._request_bucket:
+            self._request_bucket.drain(now)
+
+    @staticmethod
+    def _actual_tokens(response) -> int:
+        usage = getattr(response, "usage_metadata", None) or {}
+        return usage.get("total_tokens", 0)
+
+    def _count(self, name: str) -> None:
+        with self._condition:
+            self._counters[name] += 1
+
+    def recent_latencies(self) -> list[float]:
+        """
+        Returns the latencies of the most recent successful calls.
+        """
+        with self._condition:
+            return list(self._latencies)
+
+    def metrics(self) -> dict:
+        with self._condition:
+            queued_by_priority = {
+                priority.name.lower(): 0 for priority in Priority
+            }
+            for priority, _ in self._waiting:
+                queued_by_priority[Priority(priority).name.lower()] += 1
+
+            return {
+                **self._counters,
+                "queue_depth": len(self._waiting),
+                "queue_depth_by_priority": queued_by_priority,
+                "max_queue_depth": self._max_queue_depth,
+                "in_flight": self._in_flight,
+                "paused_seconds": max(
+                    self._blocked_until - time.monotonic(), 0.0
+                ),
+                "learned_requests_per_minute": (
+                    self._adaptive_bucket.rate * 60
+                    if self._adaptive_bucket else None
+                ),
+                "queue_wait_seconds": summarize(list(self._queue_waits)),
+                "call_latency_seconds": summarize(list(self._latencies)),
+            }
+
+
+def call_options(
+    config: dict | None,
+    default: Priority,
+) -> dict:
+    """
+    Returns the scheduler keyword arguments for an LLM call made inside
+    a graph run: its priority and the request's deadline, if any.
+    """
+    configurable = (config or {}).get("configurable", {})
+    return {
+        "priority": priority_for(config, default),
+        "deadline": configurable.get("deadline"),
+    }
+
+
+def call_group(
+    config: dict | None,
+    default: Priority,
+) -> CallGroup:
+    """
+    Returns a CallGroup with the options of `call_options`, for a call
+    that other callers may share.
+    """
+    return CallGroup(**call_options(config, default))
+
+
+def priority_for(
+    config: dict | None,
+    default: Priority,
+) -> Priority:
+    """
+    Returns the priority for an LLM call made inside a graph run.
+
+    Runs flagged as background (batch items) use BACKGROUND for every
+    call so they never delay interactive requests.
+    """
+    if config and config.get("configurable", {}).get("background"):
+        return Priority.BACKGROUND
+    return default
@@ -0,0 +1,227 @@
+import threading
+from collections import deque
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from utils.latency import summarize
+from utils.tokens import (
+    CHARS_PER_TOKEN,
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_prompt_tokens,
+    estimate_tokens,
+)
+
+# The latest user message is never trimmed below this.
+MIN_LATEST_MESSAGE_TOKENS = 64
+
+# Joins the parts of the human message, and retrieved documents.
+PART_SEPARATOR = "\n\n"
+
+
+class PromptBuilder:
+    """
+    Builds one node's prompts within a token budget.
+
+    A prompt is `[SystemMessage, HumanMessage]`: the system message
+    holds the node's static instructions and is built once, so every
+    call starts with the same prefix and provider-side prefix caching
+    can reuse it; per-request content (conversation, context,
+    question) goes last, in the human message.
+
+    Conversation and retrieved context are trimmed so the whole prompt
+    stays within `max_tokens`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        system_prompt: str,
+        max_tokens: int,
+        window: int = 1000,
+    ):
+        self.name = name
+        self.max_tokens = max_tokens
+        self.system_message = SystemMessage(content=system_prompt.strip())
+        self.system_tokens = estimate_prompt_tokens([self.system_message])
+
+        self._lock = threading.Lock()
+        self._prompt_tokens: deque[int] = deque(maxlen=window)
+        self._calls = 0
+        self._trimmed = 0
+        self._over_budget = 0
+
+    def build(self, *parts: str) -> list[BaseMessage]:
+        """
+        Returns the prompt with `parts` as the dynamic content.
+        """
+        return self.build_chat([
+            HumanMessage(content=PART_SEPARATOR.join(parts))
+        ])
+
+    def build_chat(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        """
+        Returns the prompt with `messages` after the system message.
+        """
+        prompt = [self.system_message, *messages]
+        tokens = estimate_prompt_tokens(prompt)
+
+        with self._lock:
+            self._calls += 1
+            self._prompt_tokens.append(tokens)
+            if tokens > self.max_tokens:
+                self._over_budget += 1
+        return prompt
+
+    def remaining(self, *parts: str) -> int:
+        """
+        Returns the tokens left for trimmable content once the system
+        prompt and the rest of the human message are accounted for.
+
+        Args:
+            parts: The parts that will be passed to `build`, with the
+                trimmable content left empty, so labels, wrappers and
+                the separators between parts are all counted.
+        """
+        used = (
+            self.system_tokens
+            + MESSAGE_OVERHEAD_TOKENS
+            + estimate_tokens(PART_SEPARATOR.join(parts))
+        )
+        return max(self.max_tokens - used, 0)
+
+    def fit_messages(
+        self,
+        messages: list[BaseMessage],
+        max_tokens: int,
+    ) -> list[BaseMessage]:
+        """
+        Keeps the most recent messages that fit in `max_tokens`.
+
+        The latest message is always kept, truncated if it does not fit
+        on its own.
+        """
+        if not messages:
+            return []
+
+        kept = []
+        total = 0
+        for message in reversed(messages):
+            tokens = (
+                estimate_tokens(str(message.content))
+                + MESSAGE_OVERHEAD_TOKENS
+            )
+            if kept and total + tokens > max_tokens:
+                break
+            kept.append(message)
+            total += tokens
+        kept.reverse()
+
+        latest = kept[-1]
+        limit = max(
+            max_tokens - MESSAGE_OVERHEAD_TOKENS,
+            MIN_LATEST_MESSAGE_TOKENS
+        )
+        if estimate_tokens(str(latest.content)) > limit:
+            kept[-1] = latest.model_copy(update={
+                "content": truncate_text(str(latest.content), limit)
+            })
+
+        if len(kept) < len(messages) or kept[-1] is not latest:
+            self._count_trimmed()
+        return kept
+
+    def fit_documents(
+        self,
+        documents: list[Document],
+        max_tokens: int,
+    ) -> list[Document]:
+        """
+        Keeps the highest-ranked documents that fit in `max_tokens`,
+        counting the separator they are joined with.
+
+        The top document is always kept, truncated if it does not fit
+        on its own.
+        """
+        if not documents:
+            return []
+
+        kept = []
+        total = 0
+        for document in documents:
+            tokens = estimate_tokens(
+                PART_SEPARATOR + document.page_content if kept
+                else document.page_content
+            )
+            if kept and total + tokens > max_tokens:
+                break
+            kept.append(document)
+            total += tokens
+
+        if len(kept) == 1 and total > max_tokens:
+            top = kept[0]
+            kept[0] = Document(
+                page_content=truncate_text(top.page_content, max_tokens),
+                metadata=top.metadata,
+            )
+
+        if len(kept) < len(documents) or kept[0] is not documents[0]:
+            self._count_trimmed()
+        return kept
+
+    def _count_trimmed(self) -> None:
+        with self._lock:
+            self._trimmed += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "trimmed": self._trimmed,
+                "over_budget": self._over_budget,
+                "max_tokens": self.max_tokens,
+                "system_tokens": self.system_tokens,
+                "prompt_tokens": summarize(list(self._prompt_tokens)),
+            }
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """
+    Cuts `text` to roughly `max_tokens`, at a word boundary if possible.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut
+
+
+_builders: dict[str, PromptBuilder] = {}
+_builders_lock = threading.Lock()
+
+
+def get_prompt_builder(
+    name: str,
+    system_prompt: str,
+    max_tokens: int,
+) -> PromptBuilder:
+    """
+    Returns the process-wide PromptBuilder registered under `name`.
+    """
+    with _builders_lock:
+        if name not in _builders:
+            _builders[name] = PromptBuilder(
+                name,
+                system_prompt,
+                max_tokens
+            )
+        return _builders[name]
+
+
+def prompt_stats() -> dict[str, dict]:
+    with _builders_lock:
+        builders = list(_builders.values())
+    return {builder.name: builder.metrics() for builder in builders}
@@ -1,6 +1,13 @@
-def calculator_prompt(conversation : str) -> str:
-    return f"""
-    You are a strict Expression Extraction Engine.
+from langchain_core.messages import BaseMessage
+
+from config.settings import PROMPT_MAX_TOKENS_CALCULATOR
+from prompts.builder import get_prompt_builder
+from utils.message_formatter import format_messages
+from utils.profiling import profiled
+
+
+CALCULATOR_SYSTEM_PROMPT = """
+You are a strict Expression Extraction Engine.
 
 TASK:
 Read the conversation and extract the single mathematical computation the user is currently asking for, as a valid Python-evaluable expression. Do NOT solve it.
@@ -69,7 +76,21 @@ Output: INVALID
 
 User: Can you help me write an essay?
 Output: INVALID
-
-Conversation:
-{conversation}
-    """
\ No newline at end of file
+"""
+
+calculator_prompt = get_prompt_builder(
+    "calculator",
+    CALCULATOR_SYSTEM_PROMPT,
+    PROMPT_MAX_TOKENS_CALCULATOR
+)
+
+
+@profiled("prompt_build")
+def build_calculator_prompt(
+    messages: list[BaseMessage],
+) -> list[BaseMessage]:
+    budget = calculator_prompt.remaining("Conversation:\n")
+    conversation = format_messages(
+        calculator_prompt.fit_messages(messages, budget)
+    )
+    return calculator_prompt.build(f"Conversation:\n{conversation}")
@@ -1,5 +1,11 @@
-def get_chatbot_prompt():
-    return """
+from langchain_core.messages import BaseMessage
+
+from config.settings import PROMPT_MAX_TOKENS_CHATBOT
+from prompts.builder import get_prompt_builder
+from utils.profiling import profiled
+
+
+CHATBOT_SYSTEM_PROMPT = """
     You are KrushiVerse, an AI Farming Copilot.
 
     Your responsibilities are:
@@ -8,4 +14,22 @@ def get_chatbot_prompt():
     - If you are unsure, say you don't know.
     - Never invent agricultural facts.
     - Be friendly and concise.
-    """
\ No newline at end of file
+    """
+
+chatbot_prompt = get_prompt_builder(
+    "chatbot",
+    CHATBOT_SYSTEM_PROMPT,
+    PROMPT_MAX_TOKENS_CHATBOT
+)
+
+
+@profiled("prompt_build")
+def build_chatbot_prompt(
+    messages: list[BaseMessage],
+) -> list[BaseMessage]:
+    # The chatbot sees the conversation as chat turns rather than as
+    # text, trimmed from the oldest turn.
+    budget = chatbot_prompt.remaining()
+    return chatbot_prompt.build_chat(
+        chatbot_prompt.fit_messages(messages, budget)
+    )
@@ -1,7 +1,12 @@
-def build_query_rewriter_prompt(
-    conversation: str,
-) -> str:
-    return f"""
+from langchain_core.messages import BaseMessage
+
+from config.settings import PROMPT_MAX_TOKENS_QUERY_REWRITER
+from prompts.builder import get_prompt_builder
+from utils.message_formatter import format_messages
+from utils.profiling import profiled
+
+
+QUERY_REWRITER_SYSTEM_PROMPT = """
 You are an expert at rewriting conversational questions into standalone search queries.
 
 Your task is to rewrite the user's latest question so that it is completely self-contained.
@@ -15,8 +20,27 @@ Rules:
 - Return ONLY the rewritten question.
 - If the latest question is already standalone, return it unchanged.
 - If the previous conversation is unrelated to the latest question, ignore the previous conversation and rewrite only the latest question.
-Conversation:
-{conversation}
+"""
 
-Standalone Question:
-"""
\ No newline at end of file
+query_rewriter_prompt = get_prompt_builder(
+    "query_rewriter",
+    QUERY_REWRITER_SYSTEM_PROMPT,
+    PROMPT_MAX_TOKENS_QUERY_REWRITER
+)
+
+
+@profiled("prompt_build")
+def build_query_rewriter_prompt(
+    messages: list[BaseMessage],
+) -> list[BaseMessage]:
+    budget = query_rewriter_prompt.remaining(
+        "Conversation:\n",
+        "Standalone Question:"
+    )
+    conversation = format_messages(
+        query_rewriter_prompt.fit_messages(messages, budget)
+    )
+    return query_rewriter_prompt.build(
+        f"Conversation:\n{conversation}",
+        "Standalone Question:"
+    )
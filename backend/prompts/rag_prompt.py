@@ -1,16 +1,36 @@
-def build_rag_prompt(question: str, context: str) -> str:
-    return f"""
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+
+from config.settings import PROMPT_MAX_TOKENS_RAG
+from prompts.builder import get_prompt_builder
+from rag.formatter import format_documents
+from utils.profiling import profiled
+
+
+RAG_SYSTEM_PROMPT = """
 You are KrushiVerse, an AI-powered Agriculture Assistant.
 
 Answer ONLY using the provided context.
 
 If the answer is not present in the provided context, respond with:
 "I don't have enough information in my knowledge base to answer that question."
+"""
 
-{context}
+rag_prompt = get_prompt_builder(
+    "rag",
+    RAG_SYSTEM_PROMPT,
+    PROMPT_MAX_TOKENS_RAG
+)
 
-Question:
-{question}
 
-Answer:
-"""
\ No newline at end of file
+@profiled("prompt_build")
+def build_rag_prompt(
+    question: str,
+    documents: list[Document],
+) -> list[BaseMessage]:
+    question_part = f"Question:\n{question}\n\nAnswer:"
+    budget = rag_prompt.remaining(format_documents([]), question_part)
+    context = format_documents(
+        rag_prompt.fit_documents(documents, budget)
+    )
+    return rag_prompt.build(context, question_part)
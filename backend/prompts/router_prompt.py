@@ -1,7 +1,13 @@
+from langchain_core.messages import BaseMessage
+
 from agent.routes import Route
+from config.settings import PROMPT_MAX_TOKENS_ROUTER
+from prompts.builder import get_prompt_builder
+from utils.message_formatter import format_messages
+from utils.profiling import profiled
 
 
-def build_router_prompt(conversation: str, routes: type[Route]) -> str:
+def router_system_prompt(routes: type[Route]) -> str:
     available_routes = "\n".join(
         route.value for route in routes
     )
@@ -81,9 +87,24 @@ Route: chatbot
 Question: Hey! Also, what causes powdery mildew?
 Route: rag
 
-Conversation:
-{conversation}
-Route:
-{conversation}
-Route:
-"""
\ No newline at end of file
+The conversation follows. Reply with the route for its latest message.
+"""
+
+
+router_prompt = get_prompt_builder(
+    "router",
+    router_system_prompt(Route),
+    PROMPT_MAX_TOKENS_ROUTER
+)
+
+
+@profiled("prompt_build")
+def build_router_prompt(messages: list[BaseMessage]) -> list[BaseMessage]:
+    budget = router_prompt.remaining("Conversation:\n", "Route:")
+    conversation = format_messages(
+        router_prompt.fit_messages(messages, budget)
+    )
+    return router_prompt.build(
+        f"Conversation:\n{conversation}",
+        "Route:"
+    )
@@ -0,0 +1,166 @@
+import threading
+from concurrent.futures import Future
+
+from langchain_core.documents import Document
+
+from config.settings import (
+    RETRIEVAL_BATCH_MAX_SIZE,
+    RETRIEVAL_BATCH_MAX_WAIT_MS,
+    RETRIEVAL_MODE,
+    RETRIEVAL_CANDIDATES,
+)
+from .lexical_index import get_lexical_index
+from .retriever import fuse_rankings
+from .vector_store import get_index
+from utils.profiling import span
+
+
+class RetrievalBatcher:
+    """
+    Collects retrieval queries from the items of one /chat/batch call
+    and serves them with one embedding call and one Chroma query.
+
+    Items `join` when their graph run starts and `leave` once they can
+    no longer reach retrieval (routed elsewhere, answered from the
+    keyword index, sharing another run's answer, or finished). The
+    first query to arrive becomes the leader: it waits until every
+    item still in the batcher has a query pending (or `max_batch_size`
+    are pending, or `max_wait_seconds` have passed), takes everything
+    pending and runs the batch for all waiters.
+    """
+
+    def __init__(
+        self,
+        k: int = 5,
+        max_batch_size: int = 32,
+        max_wait_seconds: float = 0.02,
+    ):
+        self.k = k
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: list[tuple[str, Future]] = []
+        self._members: set[str] = set()
+        self._condition = threading.Condition()
+
+    def join(self, member: str) -> None:
+        with self._condition:
+            self._members.add(member)
+
+    def leave(self, member: str) -> None:
+        """
+        Stops waiting for `member`; leaving twice is harmless.
+        """
+        with self._condition:
+            self._members.discard(member)
+            self._condition.notify_all()
+
+    def _ready(self) -> bool:
+        return (
+            len(self._pending) >= self.max_batch_size
+            or len(self._pending) >= len(self._members)
+        )
+
+    def retrieve(self, query: str, member: str) -> list[Document]:
+        future: Future = Future()
+
+        with self._condition:
+            self._pending.append((query, future))
+            is_leader = len(self._pending) == 1
+            if self._ready():
+                self._condition.notify_all()
+
+        if is_leader:
+            with self._condition:
+                self._condition.wait_for(
+                    self._ready,
+                    timeout=self.max_wait_seconds,
+                )
+                batch = self._pending
+                self._pending = []
+            self._run_batch(batch)
+
+        try:
+            return future.result()
+        finally:
+            self.leave(member)
+
+    def _run_batch(self, batch: list[tuple[str, Future]]) -> None:
+        # Identical queries in a batch share one embedding and search.
+        queries = list(dict.fromkeys(query for query, _ in batch))
+
+        try:
+            results = self.search(queries)
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        documents_by_query = dict(zip(queries, results))
+        for query, future in batch:
+            future.set_result(documents_by_query[query])
+
+    def search(self, queries: list[str]) -> list[list[Document]]:
+        """
+        Embeds `queries` in one forward pass and searches them in one
+        Chroma query. Returns the top-k documents for each query.
+
+        Follows RETRIEVAL_MODE like `retrieve_documents`: in hybrid
+        mode each query's vector results are fused with its lexical
+        results, and in keyword mode nothing is embedded.
+        """
+        index = get_index()
+        if RETRIEVAL_MODE == "keyword":
+            lexical_index = get_lexical_index(index)
+            with span("lexical_search", "batch_search"):
+                return [
+                    lexical_index.search(query, self.k)
+                    for query in queries
+                ]
+
+        vector_store = index.vector_store
+        hybrid = RETRIEVAL_MODE == "hybrid"
+        with span("embedding", "embed_batch"):
+            embeddings = vector_store.embeddings.embed_documents(queries)
+
+        with span("chroma_query", "batch_query"):
+            result = vector_store._collection.query(
+                query_embeddings=embeddings,
+                n_results=RETRIEVAL_CANDIDATES if hybrid else self.k,
+                include=["documents", "metadatas"],
+            )
+
+        rankings = [
+            [
+                Document(
+                    id=chunk_id,
+                    page_content=text,
+                    metadata=metadata or {},
+                )
+                for chunk_id, text, metadata in zip(ids, texts, metadatas)
+            ]
+            for ids, texts, metadatas in zip(
+                result["ids"],
+                result["documents"],
+                result["metadatas"],
+            )
+        ]
+        if not hybrid:
+            return rankings
+
+        lexical_index = get_lexical_index(index)
+        with span("lexical_search", "batch_search"):
+            return [
+                fuse_rankings(
+                    [ranking, lexical_index.search(query, RETRIEVAL_CANDIDATES)],
+                    self.k
+                )
+                for query, ranking in zip(queries, rankings)
+            ]
+
+
+def create_retrieval_batcher() -> RetrievalBatcher:
+    return RetrievalBatcher(
+        k=5,
+        max_batch_size=RETRIEVAL_BATCH_MAX_SIZE,
+        max_wait_seconds=RETRIEVAL_BATCH_MAX_WAIT_MS / 1000,
+    )
@@ -1,56 +1,197 @@
+from contextlib import contextmanager
 from pathlib import Path
 
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 
+from config.settings import KB_KEEP_VERSIONS
 from .hash_utils import calculate_file_hash
+from .lexical_index import (
+    delete_lexical_index,
+    get_lexical_index,
+    set_lexical_index,
+)
+from . import vector_store as vector_store_module
 from .vector_store import (
-    get_file_hash,
-    delete_document,
-    get_vector_store
+    IndexHandle,
+    activate_index,
+    collection_name,
+    copy_documents,
+    get_index,
+    get_indexed_sources,
+    open_collection,
 )
 from .splitter import get_text_splitter
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 PDF_DIRECTORY = ROOT_DIR / "knowledge_base" / "raw"
 
+INGEST_LOCK_FILE = ".ingest.lock"
+
+
+def ingest() -> IndexHandle | None:
+    """
+    Brings the index up to date with PDF_DIRECTORY.
+
+    Changes are written to a new index version: unchanged documents
+    are copied over with their stored embeddings, new and modified
+    files are embedded, and deleted files are left out. The version's
+    lexical index is updated the same way, per source. The new
+    version is activated only once complete, so readers of the
+    current version are never affected by a partial update.
 
-def ingest():
+    Only one ingest runs at a time across processes (server workers,
+    the standalone watcher, a manual run); the others wait and then
+    start from the version it activated.
 
-    vector_store = get_vector_store()
-    splitter = get_text_splitter()
-    for pdf_file in PDF_DIRECTORY.rglob("*.pdf"):
-        source = pdf_file.relative_to(ROOT_DIR).as_posix()
+    Returns:
+        The new index version, or None if nothing changed.
+    """
+    with ingest_lock():
+        return _ingest()
 
+
+@contextmanager
+def ingest_lock():
+    """
+    Holds an exclusive lock on CHROMA_DB_DIR/.ingest.lock.
+
+    The lock is tied to the open file, so it is released if the
+    process dies, and it also excludes other threads of this process.
+    Uses flock on POSIX and msvcrt.locking on Windows.
+    """
+    directory = vector_store_module.CHROMA_DB_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / INGEST_LOCK_FILE, "a+") as lock_file:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+
+            # Lock the first byte; LK_LOCK gives up after ten seconds,
+            # so keep trying for as long as another ingest runs.
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+def _ingest() -> IndexHandle | None:
+    # Step 1: Compare the files on disk with the active index
+    # Read the pointer again: another process may have activated a
+    # new version while this one waited for the lock.
+    current = get_index(refresh=True)
+    indexed = get_indexed_sources(current.vector_store)
+
+    files = {
+        pdf_file.relative_to(ROOT_DIR).as_posix(): pdf_file
+        for pdf_file in PDF_DIRECTORY.rglob("*.pdf")
+    }
+    removed = set(indexed) - set(files)
+
+    # Step 2: Load and split new and modified files
+    updated: dict[str, list[Document]] = {}
+    for source, pdf_file in files.items():
         try:
             print(f"Processing {pdf_file.name}")
             file_hash = calculate_file_hash(pdf_file)
-            stored_hash = get_file_hash(source)
 
-            if stored_hash == file_hash:
+            if indexed.get(source) == file_hash:
                 print("Already indexed. Skipping.")
                 continue
 
-            loader = PyPDFLoader(str(pdf_file))
-            documents = loader.load()
-            print(f"Pages: {len(documents)}") #
-            print(f"Length of first page: {len(documents[0].page_content)}")
-            chunks = splitter.split_documents(documents)
-            print(f"Chunks: {len(chunks)}") #
-            non_empty_chunks = [ #
-            chunk for chunk in chunks     #
-            if chunk.page_content.strip()  #
-            ]        #
+            updated[source] = load_chunks(pdf_file, source, file_hash)
+        except Exception as exc:
+            # The previous version of the file, if any, stays indexed.
+            print(f"Failed to process {pdf_file.name}: {exc}")
+            continue
+
+    if not updated and not removed:
+        print("Knowledge base is up to date.")
+        return None
 
-            print(f"Non Empty Chunks: {len(non_empty_chunks)}")  #
+    # Step 3: Build the next version next to the active one
+    version = current.version + 1
+    vector_store = open_collection(collection_name(version))
+    # Left over from an interrupted run.
+    vector_store.reset_collection()
 
-            for chunk in chunks:
-                chunk.metadata["source"] = source
-                chunk.metadata["file_hash"] = file_hash
+    replaced = set(updated) | removed
+    copied = copy_documents(
+        current.vector_store,
+        vector_store,
+        exclude_sources=replaced
+    )
+    lexical_index = get_lexical_index(current).copy(
+        exclude_sources=replaced
+    )
+    for source, chunks in updated.items():
+        ids = vector_store.add_documents(chunks)
+        lexical_index.add(ids, chunks)
+        print(f"Indexed {len(chunks)} chunks from {source}")
+    for source in removed:
+        print(f"Removed {source}")
 
-            delete_document(source)
-            vector_store.add_documents(chunks)
+    # Step 4: Swap readers over and drop versions no longer needed
+    set_lexical_index(collection_name(version), lexical_index)
+    handle = activate_index(version)
+    print(
+        f"Activated index v{version}: {copied} chunks reused, "
+        f"{len(updated)} files indexed, {len(removed)} removed"
+    )
+    drop_version(version - KB_KEEP_VERSIONS)
 
-            print(f"Indexed {len(chunks)} chunks from {pdf_file.name}")
-        except Exception as exc:
-            print(f"Failed to process {pdf_file.name}: {exc}")
-            continue
\ No newline at end of file
+    return handle
+
+
+def load_chunks(
+    pdf_file: Path,
+    source: str,
+    file_hash: str,
+) -> list[Document]:
+    loader = PyPDFLoader(str(pdf_file))
+    documents = loader.load()
+    print(f"Pages: {len(documents)}") #
+    print(f"Length of first page: {len(documents[0].page_content)}")
+    chunks = get_text_splitter().split_documents(documents)
+    print(f"Chunks: {len(chunks)}") #
+    non_empty_chunks = [ #
+    chunk for chunk in chunks     #
+    if chunk.page_content.strip()  #
+    ]        #
+
+    print(f"Non Empty Chunks: {len(non_empty_chunks)}")  #
+
+    for chunk in chunks:
+        chunk.metadata["source"] = source
+        chunk.metadata["file_hash"] = file_hash
+
+    return chunks
+
+
+def drop_version(version: int) -> None:
+    """
+    Deletes the collection of an old index version.
+
+    Versions between it and the active one are kept, so requests that
+    picked up the previous version just before a swap can finish.
+    """
+    if version < 0:
+        return
+
+    try:
+        open_collection(collection_name(version)).delete_collection()
+        delete_lexical_index(collection_name(version))
+    except Exception as exc:
+        print(f"Failed to drop index v{version}: {exc}")
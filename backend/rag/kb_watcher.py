@@ -0,0 +1,119 @@
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import (
+    KB_WATCH_ENABLED,
+    KB_WATCH_POLL_SECONDS,
+    KB_WATCH_DEBOUNCE_SECONDS,
+)
+from . import ingest as ingest_module
+
+
+def snapshot(directory: Path) -> dict[str, tuple[int, int]]:
+    """
+    Returns (mtime, size) of every PDF under `directory`.
+    """
+    files = {}
+    for pdf_file in directory.rglob("*.pdf"):
+        try:
+            stat = pdf_file.stat()
+        except FileNotFoundError:
+            continue
+        files[pdf_file.as_posix()] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+class KnowledgeBaseWatcher:
+    """
+    Re-ingests the knowledge base when its PDFs change.
+
+    Polls the directory every `poll_seconds` and waits until it has
+    been quiet for `debounce_seconds` (a copy in progress keeps
+    changing size) before running `ingest()` on its own thread.
+    Requests keep using the active index until the new version is
+    swapped in. A failed ingest is retried on the next poll.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        poll_seconds: float,
+        debounce_seconds: float,
+    ):
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._ingests = 0
+        self._failures = 0
+        self._last_ingest_at: float | None = None
+
+    def start(self) -> "KnowledgeBaseWatcher":
+        self._thread = threading.Thread(
+            target=self.run,
+            name="kb-watcher",
+            daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run(self) -> None:
+        # Catch up on changes made while the process was down. The
+        # snapshot is taken first so edits made during the ingest are
+        # picked up by the next one.
+        current = snapshot(self.directory)
+        ingested = current if self._ingest() else None
+        changed_at = None
+
+        while not self._stop.wait(self.poll_seconds):
+            latest = snapshot(self.directory)
+            if latest != current:
+                current = latest
+                changed_at = time.monotonic()
+                continue
+
+            quiet_for = time.monotonic() - (changed_at or 0)
+            if current != ingested and quiet_for >= self.debounce_seconds:
+                if self._ingest():
+                    ingested = current
+
+    def _ingest(self) -> bool:
+        try:
+            ingest_module.ingest()
+        except Exception as exc:
+            self._failures += 1
+            print(f"Knowledge base ingest failed: {exc}")
+            return False
+        self._ingests += 1
+        self._last_ingest_at = time.time()
+        return True
+
+    def metrics(self) -> dict:
+        return {
+            "ingests": self._ingests,
+            "failures": self._failures,
+            "last_ingest_at": self._last_ingest_at,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_kb_watcher() -> KnowledgeBaseWatcher | None:
+    """
+    Returns the process-wide watcher, or None if watching is disabled.
+    """
+    if not KB_WATCH_ENABLED:
+        return None
+
+    return KnowledgeBaseWatcher(
+        ingest_module.PDF_DIRECTORY,
+        poll_seconds=KB_WATCH_POLL_SECONDS,
+        debounce_seconds=KB_WATCH_DEBOUNCE_SECONDS,
+    )
@@ -0,0 +1,240 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from . import vector_store as vector_store_module
+from .vector_store import IndexHandle
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does",
+    "for", "from", "how", "i", "in", "is", "it", "my", "of", "on", "or",
+    "should", "the", "to", "what", "when", "which", "why", "with",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS
+    ]
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over the chunks of one index version.
+
+    Exact terms such as variety names, active ingredients and disease
+    names are matched literally, which MiniLM similarity ranks poorly.
+    Chunks keep the ids they have in Chroma so lexical and vector
+    results can be fused. An index is not modified once its version
+    is active; a rebuild works on a copy.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._documents: dict[str, Document] = {}
+        self._lengths: dict[str, int] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, ids: list[str], documents: list[Document]) -> None:
+        for chunk_id, document in zip(ids, documents):
+            terms = Counter(tokenize(document.page_content))
+            self._documents[chunk_id] = Document(
+                id=chunk_id,
+                page_content=document.page_content,
+                metadata=document.metadata,
+            )
+            self._lengths[chunk_id] = sum(terms.values())
+            self._total_length += self._lengths[chunk_id]
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[chunk_id] = count
+
+    def copy(self, exclude_sources: set[str]) -> "LexicalIndex":
+        """
+        Returns a new index without the chunks of `exclude_sources`.
+        """
+        index = LexicalIndex(self.k1, self.b)
+        kept = [
+            (chunk_id, document)
+            for chunk_id, document in self._documents.items()
+            if document.metadata.get("source") not in exclude_sources
+        ]
+        index.add(
+            [chunk_id for chunk_id, _ in kept],
+            [document for _, document in kept]
+        )
+        return index
+
+    def search(self, query: str, k: int = 5) -> list[Document]:
+        """
+        Returns the top `k` chunks for `query` by BM25 score.
+        """
+        if not self._documents:
+            return []
+
+        count = len(self._documents)
+        average_length = self._total_length / count
+        scores: dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(
+                1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for chunk_id, frequency in postings.items():
+                length_norm = 1 - self.b + self.b * (
+                    self._lengths[chunk_id] / average_length
+                )
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * (
+                    frequency * (self.k1 + 1)
+                    / (frequency + self.k1 * length_norm)
+                )
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [self._documents[chunk_id] for chunk_id in ranked]
+
+    def save(self, path: Path) -> None:
+        # Only the chunks are stored; postings are rebuilt on load.
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "chunks": [
+                [chunk_id, document.page_content, document.metadata]
+                for chunk_id, document in self._documents.items()
+            ],
+        }))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        data = json.loads(path.read_text())
+        index = cls(data["k1"], data["b"])
+        index.add(
+            [chunk_id for chunk_id, _, _ in data["chunks"]],
+            [
+                Document(page_content=text, metadata=metadata or {})
+                for _, text, metadata in data["chunks"]
+            ]
+        )
+        return index
+
+    @classmethod
+    def from_collection(
+        cls,
+        vector_store: Chroma,
+        batch_size: int = 1000,
+    ) -> "LexicalIndex":
+        """
+        Builds the index from the chunks already stored in Chroma,
+        reading them `batch_size` at a time.
+        """
+        index = cls()
+        offset = 0
+        while True:
+            data = vector_store.get(
+                include=["documents", "metadatas"],
+                limit=batch_size,
+                offset=offset,
+            )
+            if not data["ids"]:
+                return index
+            offset += len(data["ids"])
+
+            index.add(
+                data["ids"],
+                [
+                    Document(page_content=text or "", metadata=metadata or {})
+                    for text, metadata in zip(
+                        data["documents"],
+                        data["metadatas"]
+                    )
+                ]
+            )
+
+
+_indexes: dict[Path, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+# One lock per index being loaded or built, so a slow build does not
+# hold up lookups of other versions.
+_build_locks: dict[Path, threading.Lock] = {}
+
+
+def lexical_index_path(collection_name: str) -> Path:
+    return vector_store_module.CHROMA_DB_DIR / "lexical" / f"{collection_name}.json"
+
+
+def get_lexical_index(handle: IndexHandle) -> LexicalIndex:
+    """
+    Returns the lexical index of an index version.
+
+    Versions ingested before lexical indexing existed are indexed from
+    their Chroma collection on first use. Concurrent first uses of a
+    version wait for a single build.
+    """
+    path = lexical_index_path(handle.collection_name)
+
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is not None:
+            return index
+        build_lock = _build_locks.setdefault(path, threading.Lock())
+
+    with build_lock:
+        with _indexes_lock:
+            index = _indexes.get(path)
+        if index is not None:
+            return index
+
+        if path.exists():
+            index = LexicalIndex.load(path)
+        else:
+            index = LexicalIndex.from_collection(handle.vector_store)
+            index.save(path)
+
+        with _indexes_lock:
+            _cache(path, index)
+            _build_locks.pop(path, None)
+        return index
+
+
+def set_lexical_index(collection_name: str, index: LexicalIndex) -> None:
+    """
+    Persists the lexical index of a new index version.
+    """
+    path = lexical_index_path(collection_name)
+    index.save(path)
+    with _indexes_lock:
+        _cache(path, index)
+
+
+def delete_lexical_index(collection_name: str) -> None:
+    path = lexical_index_path(collection_name)
+    with _indexes_lock:
+        _indexes.pop(path, None)
+    path.unlink(missing_ok=True)
+
+
+def _cache(path: Path, index: LexicalIndex) -> None:
+    # The active version and the one just before it are enough.
+    _indexes[path] = index
+    while len(_indexes) > 2:
+        _indexes.pop(next(iter(_indexes)))
@@ -6,7 +6,16 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from rag.vector_store import get_vector_store
+from langchain_core.documents import Document
+
+from config.settings import (
+    RETRIEVAL_MODE,
+    RETRIEVAL_CANDIDATES,
+    RETRIEVAL_RRF_K,
+)
+from rag.lexical_index import get_lexical_index
+from rag.vector_store import IndexHandle, get_index, get_vector_store
+from utils.profiling import span
 
 def get_retriever():
     vector_store = get_vector_store()
@@ -19,3 +28,87 @@ def get_retriever():
     )
 
 
+def retrieve_documents(
+    query: str,
+    k: int = 5,
+    mode: str = RETRIEVAL_MODE,
+) -> list[Document]:
+    """
+    Returns the top `k` chunks for `query`.
+
+    Args:
+        query: Search query.
+        k: Number of chunks to return.
+        mode: "vector" (embedding similarity), "keyword" (BM25 only,
+            no embedding pass) or "hybrid" (both, fused by rank).
+    """
+    if mode == "keyword":
+        return keyword_search(query, k)
+    if mode == "hybrid":
+        return hybrid_search(query, k)
+    return vector_search(query, k)
+
+
+def vector_search(
+    query: str,
+    k: int = 5,
+    index: IndexHandle | None = None,
+) -> list[Document]:
+    """
+    Same search as `get_retriever().invoke(query)`, with the embedding
+    forward pass and the Chroma query timed separately.
+    """
+    vector_store = (index or get_index()).vector_store
+
+    with span("embedding", "embed_query"):
+        embedding = vector_store.embeddings.embed_query(query)
+
+    with span("chroma_query", "similarity_search"):
+        return vector_store.similarity_search_by_vector(
+            embedding,
+            k=k
+        )
+
+
+def keyword_search(
+    query: str,
+    k: int = 5,
+    index: IndexHandle | None = None,
+) -> list[Document]:
+    lexical_index = get_lexical_index(index or get_index())
+
+    with span("lexical_search"):
+        return lexical_index.search(query, k)
+
+
+def hybrid_search(query: str, k: int = 5) -> list[Document]:
+    # Both searches read the same index version.
+    index = get_index()
+    vector_results = vector_search(query, RETRIEVAL_CANDIDATES, index)
+    keyword_results = keyword_search(query, RETRIEVAL_CANDIDATES, index)
+
+    return fuse_rankings([vector_results, keyword_results], k)
+
+
+def fuse_rankings(
+    rankings: list[list[Document]],
+    k: int = 5,
+) -> list[Document]:
+    """
+    Merges ranked result lists with reciprocal rank fusion.
+
+    Each chunk scores sum(1 / (RETRIEVAL_RRF_K + rank)) over the lists
+    it appears in, so agreement between rankings counts for more than
+    a high score in one of them.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document.id or document.page_content
+            scores[key] = scores.get(key, 0.0) + 1 / (RETRIEVAL_RRF_K + rank)
+            documents.setdefault(key, document)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in ranked]
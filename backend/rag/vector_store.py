@@ -1,52 +1,216 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from langchain_chroma import Chroma
 from .embedding_model import get_embedding_model
-from functools import lru_cache
+
+from config.settings import KB_INDEX_CHECK_SECONDS
 
 # Project Directories
 ROOT_DIR = Path(__file__).resolve().parents[2]
 CHROMA_DB_DIR = ROOT_DIR / "chroma_db"
 
-@lru_cache(maxsize=1)
-def get_vector_store() -> Chroma:
+# Version 0 is the collection built before indexes were versioned.
+DEFAULT_COLLECTION = "langchain"
+ACTIVE_INDEX_FILE = "active_index.json"
+
+
+@dataclass(frozen=True)
+class IndexHandle:
+    """
+    One immutable version of the knowledge-base index.
+
+    Readers take a handle once per request; a rebuild creates a new
+    collection and swaps the active handle, so a request never sees
+    a half-updated index.
+    """
+    version: int
+    collection_name: str
+    vector_store: Chroma
+
+
+_active_index: IndexHandle | None = None
+_pointer_mtime: float | None = None
+_next_pointer_check = 0.0
+_index_lock = threading.Lock()
+
+
+def collection_name(version: int) -> str:
+    if version == 0:
+        return DEFAULT_COLLECTION
+    return f"knowledge_base_v{version}"
+
+
+def open_collection(name: str) -> Chroma:
     """
-    Returns a configured Chroma vector store.
+    Returns a Chroma vector store for collection `name`.
     """
 
     embeddings = get_embedding_model()
 
     return Chroma(
+        collection_name=name,
         persist_directory=CHROMA_DB_DIR.as_posix(),
         embedding_function=embeddings,
     )
 
 
-def get_file_hash(source: str) -> str | None:
+def get_index(refresh: bool = False) -> IndexHandle:
+    """
+    Returns the active index version.
+
+    The active version is recorded in a pointer file next to the
+    Chroma data, which is re-read (at most every KB_INDEX_CHECK_SECONDS,
+    or now with `refresh`) when it changes, so an index rebuilt by
+    another process is picked up without a restart.
+    """
+    global _next_pointer_check
+
+    now = time.monotonic()
+    if (
+        not refresh
+        and _active_index is not None
+        and now < _next_pointer_check
+    ):
+        return _active_index
+
+    with _index_lock:
+        _next_pointer_check = now + KB_INDEX_CHECK_SECONDS
+        pointer = CHROMA_DB_DIR / ACTIVE_INDEX_FILE
+        try:
+            mtime = pointer.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if _active_index is None or mtime != _pointer_mtime:
+            version = 0
+            if mtime is not None:
+                version = json.loads(pointer.read_text())["version"]
+            if _active_index is None or version != _active_index.version:
+                _set_active_index(version)
+            _remember_pointer(mtime)
+
+        return _active_index
+
+
+def get_vector_store() -> Chroma:
+    """
+    Returns the vector store of the active index version.
+    """
+
+    return get_index().vector_store
+
+
+def get_index_version() -> int:
+    return get_index().version
+
+
+def activate_index(version: int) -> IndexHandle:
     """
-    Returns the stored hash of a document.
-    Returns None if the document has never been indexed.
+    Makes `version` the active index for this and other processes.
     """
+    pointer = CHROMA_DB_DIR / ACTIVE_INDEX_FILE
+    temporary = pointer.with_suffix(".tmp")
+
+    with _index_lock:
+        CHROMA_DB_DIR.mkdir(parents=True, exist_ok=True)
+        temporary.write_text(json.dumps({
+            "version": version,
+            "collection": collection_name(version),
+        }))
+        os.replace(temporary, pointer)
+        _remember_pointer(pointer.stat().st_mtime)
+        return _set_active_index(version)
+
+
+def reset_index() -> None:
+    """
+    Forgets the active index, e.g. after CHROMA_DB_DIR changed.
+    """
+    global _active_index, _pointer_mtime, _next_pointer_check
+
+    with _index_lock:
+        _active_index = None
+        _pointer_mtime = None
+        _next_pointer_check = 0.0
 
-    vector_store = get_vector_store()
+
+def _set_active_index(version: int) -> IndexHandle:
+    global _active_index
+
+    name = collection_name(version)
+    _active_index = IndexHandle(
+        version=version,
+        collection_name=name,
+        vector_store=open_collection(name),
+    )
+    print(f"Using knowledge base index v{version} ({name})")
+    return _active_index
+
+
+def _remember_pointer(mtime: float | None) -> None:
+    global _pointer_mtime
+    _pointer_mtime = mtime
+
+
+def get_indexed_sources(vector_store: Chroma) -> dict[str, str]:
+    """
+    Returns the stored hash of every indexed document, by source.
+    """
 
     result = vector_store.get(
-        where={"source": source},
         include=["metadatas"]
     )
 
-    if not result["ids"]:
-        return None
+    return {
+        metadata["source"]: metadata["file_hash"]
+        for metadata in result["metadatas"]
+        if metadata and "source" in metadata
+    }
 
-    return result["metadatas"][0]["file_hash"]
 
-
-def delete_document(source: str) -> None:
+def copy_documents(
+    source: Chroma,
+    target: Chroma,
+    exclude_sources: set[str],
+    batch_size: int = 1000,
+) -> int:
     """
-    Deletes all chunks belonging to a document.
+    Copies chunks with their stored embeddings from `source` to
+    `target`, skipping documents in `exclude_sources`.
+
+    Chunks are read and written `batch_size` at a time, so memory use
+    does not grow with the collection. `source` must not change while
+    it is copied; index versions are not modified once active.
+
+    Returns the number of chunks copied.
     """
 
-    vector_store = get_vector_store()
+    copied = 0
+    offset = 0
+    while True:
+        data = source._collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=batch_size,
+            offset=offset,
+        )
+        if not data["ids"]:
+            return copied
+        offset += len(data["ids"])
 
-    vector_store.delete(
-        where={"source": source}
-    )
\ No newline at end of file
+        keep = [
+            index
+            for index, metadata in enumerate(data["metadatas"])
+            if (metadata or {}).get("source") not in exclude_sources
+        ]
+        if keep:
+            target._collection.add(
+                ids=[data["ids"][i] for i in keep],
+                embeddings=[data["embeddings"][i] for i in keep],
+                documents=[data["documents"][i] for i in keep],
+                metadatas=[data["metadatas"][i] for i in keep],
+            )
+            copied += len(keep)
@@ -0,0 +1,11 @@
+import os
+import sys
+from pathlib import Path
+
+
+# Modules import each other from backend/, as when the API runs there.
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+# config.settings requires a key; the tests never reach Groq.
+os.environ.setdefault("GROQ_API_KEY", "offline-tests")
@@ -0,0 +1,381 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.documents import Document
+
+from api.admission import AdmissionController, AdmissionRejected
+from benchmarks.fakes import FakeChatModel
+from model.hedging import HedgedLLM
+from model.scheduler import (
+    CallGroup,
+    LLMCallCancelled,
+    LLMQueueTimeout,
+    LLMScheduler,
+    Priority,
+)
+from rag.batch_retriever import RetrievalBatcher
+from utils.single_flight import SingleFlight
+
+
+class RecordingChatModel(FakeChatModel):
+    """
+    FakeChatModel that remembers the order prompts reached it in.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05, **kwargs):
+        super().__init__(
+            latency_seconds=latency_seconds,
+            tokens_per_second=1_000_000,
+            output_tokens=1,
+            **kwargs
+        )
+        self.prompts: list[str] = []
+
+    def invoke(self, input, config=None, **kwargs):
+        with self._lock:
+            self.prompts.append(input)
+        return super().invoke(input, config, **kwargs)
+
+
+def wait_until(predicate, timeout: float = 2.0) -> None:
+    limit = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < limit, "condition not reached in time"
+        time.sleep(0.005)
+
+
+def queue_depth(scheduler: LLMScheduler) -> int:
+    return scheduler.metrics()["queue_depth"]
+
+
+# LLMScheduler
+
+
+def test_scheduler_serves_higher_priority_first():
+    model = RecordingChatModel()
+    scheduler = LLMScheduler(model, max_concurrency=1)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(scheduler.invoke, "first")]
+        wait_until(lambda: model.calls == 1)
+
+        # Queued lowest priority first, behind the call holding the slot.
+        for depth, priority in enumerate(reversed(Priority), start=1):
+            futures.append(executor.submit(
+                scheduler.invoke,
+                priority.name,
+                priority=priority
+            ))
+            wait_until(lambda: queue_depth(scheduler) == depth)
+
+        for future in futures:
+            future.result()
+
+    assert model.prompts == ["first", "INTERACTIVE", "STANDARD", "BACKGROUND"]
+
+
+def test_scheduler_cancel_removes_queued_call():
+    model = RecordingChatModel(latency_seconds=0.2)
+    scheduler = LLMScheduler(model, max_concurrency=1)
+    cancel = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(scheduler.invoke, "first")
+        wait_until(lambda: model.calls == 1)
+        queued = executor.submit(scheduler.invoke, "queued", cancel=cancel)
+        wait_until(lambda: queue_depth(scheduler) == 1)
+
+        scheduler.cancel(cancel)
+        with pytest.raises(LLMCallCancelled):
+            queued.result(timeout=1)
+        assert not first.done()
+        first.result()
+
+    assert model.prompts == ["first"]
+    metrics = scheduler.metrics()
+    assert metrics["cancelled"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+def test_call_group_join_moves_queued_call_up():
+    model = RecordingChatModel()
+    scheduler = LLMScheduler(model, max_concurrency=1)
+    group = CallGroup(Priority.BACKGROUND)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        first = executor.submit(scheduler.invoke, "first")
+        wait_until(lambda: model.calls == 1)
+        shared = executor.submit(scheduler.invoke, "shared", group=group)
+        wait_until(lambda: queue_depth(scheduler) == 1)
+        standard = executor.submit(
+            scheduler.invoke,
+            "standard",
+            priority=Priority.STANDARD
+        )
+        wait_until(lambda: queue_depth(scheduler) == 2)
+
+        # An interactive caller joins the background call while queued.
+        group.join(CallGroup(Priority.INTERACTIVE))
+        for future in (first, shared, standard):
+            future.result()
+
+    assert model.prompts == ["first", "shared", "standard"]
+
+
+def test_call_group_join_keeps_latest_deadline():
+    group = CallGroup(Priority.STANDARD, deadline=10.0)
+    group.join(CallGroup(Priority.BACKGROUND, deadline=20.0))
+    assert group.priority == Priority.STANDARD
+    assert group.deadline == 20.0
+
+    group.join(CallGroup(Priority.BACKGROUND))
+    assert group.deadline is None
+    assert group.deadline_before(5.0) == 5.0
+
+
+# SingleFlight
+
+
+def test_single_flight_waiter_retries_after_leader_times_out():
+    flight = SingleFlight("test")
+    follower_waiting = threading.Event()
+
+    def leader():
+        follower_waiting.wait(1)
+        raise LLMQueueTimeout("Timed out waiting for LLM capacity.")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leading = executor.submit(flight.do, "key", leader)
+        wait_until(lambda: flight.stats()["in_flight"] == 1)
+        following = executor.submit(
+            flight.do,
+            "key",
+            lambda: "answer",
+            on_wait=follower_waiting.set,
+            retry_on=(LLMQueueTimeout,)
+        )
+
+        with pytest.raises(LLMQueueTimeout):
+            leading.result()
+        assert following.result() == "answer"
+
+    stats = flight.stats()
+    assert stats["executions"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_single_flight_waiter_shares_other_failures():
+    flight = SingleFlight("test")
+    follower_waiting = threading.Event()
+
+    def leader():
+        follower_waiting.wait(1)
+        raise ValueError("bad answer")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leading = executor.submit(flight.do, "key", leader)
+        wait_until(lambda: flight.stats()["in_flight"] == 1)
+        following = executor.submit(
+            flight.do,
+            "key",
+            lambda: "answer",
+            on_wait=follower_waiting.set,
+            retry_on=(LLMQueueTimeout,)
+        )
+
+        for future in (leading, following):
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert flight.stats()["executions"] == 1
+
+
+# AdmissionController
+
+
+def make_controller(**overrides) -> AdmissionController:
+    options = {
+        "max_in_flight": 2,
+        "max_queue": 2,
+        "per_user_limit": 4,
+        "per_thread_max_pending": 4,
+        "retry_after_seconds": 1.0,
+    }
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def deadline_in(seconds: float = 5.0) -> float:
+    return time.monotonic() + seconds
+
+
+def test_admission_runs_a_thread_one_turn_at_a_time_in_order():
+    controller = make_controller(max_in_flight=4)
+    events = []
+
+    async def turn(number: int) -> None:
+        async with controller.admit(f"user-{number}", "thread", deadline_in()):
+            events.append(("start", number))
+            await asyncio.sleep(0.01)
+            events.append(("end", number))
+
+    async def main() -> None:
+        await asyncio.gather(*(turn(number) for number in range(3)))
+
+    asyncio.run(main())
+
+    assert events == [
+        ("start", 0), ("end", 0),
+        ("start", 1), ("end", 1),
+        ("start", 2), ("end", 2),
+    ]
+    assert controller.metrics()["admitted"] == 3
+
+
+def test_admission_sheds_load_when_full():
+    controller = make_controller(max_in_flight=1, max_queue=0)
+
+    async def main() -> AdmissionRejected:
+        async with controller.admit("user-a", "thread-a", deadline_in()):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit("user-b", "thread-b", deadline_in()):
+                    pass
+        return rejected.value
+
+    rejected = asyncio.run(main())
+
+    assert rejected.status_code == 503
+    assert rejected.retry_after == 1.0
+    assert controller.metrics()["rejected_overload"] == 1
+
+
+@pytest.mark.parametrize(
+    "user_id, thread_id, counter",
+    [
+        ("user-a", "thread-b", "rejected_user"),
+        ("user-b", "thread-a", "rejected_thread"),
+    ]
+)
+def test_admission_limits_users_and_threads(user_id, thread_id, counter):
+    controller = make_controller(per_user_limit=1, per_thread_max_pending=1)
+
+    async def main() -> AdmissionRejected:
+        async with controller.admit("user-a", "thread-a", deadline_in()):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit(user_id, thread_id, deadline_in()):
+                    pass
+        return rejected.value
+
+    rejected = asyncio.run(main())
+
+    assert rejected.status_code == 429
+    assert rejected.retry_after == 1.0
+    assert controller.metrics()[counter] == 1
+
+
+def test_admission_drops_requests_past_their_deadline():
+    controller = make_controller(max_in_flight=1, max_queue=1)
+
+    async def main() -> AdmissionRejected:
+        async with controller.admit("user-a", "thread-a", deadline_in()):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit(
+                    "user-b",
+                    "thread-b",
+                    deadline_in(0.05)
+                ):
+                    pass
+        return rejected.value
+
+    rejected = asyncio.run(main())
+
+    assert rejected.status_code == 504
+    metrics = controller.metrics()
+    assert metrics["dropped_deadline"] == 1
+    assert metrics["in_flight"] == 0
+    assert metrics["queued"] == 0
+
+
+# RetrievalBatcher
+
+
+def recording_batcher(searches: list[list[str]]) -> RetrievalBatcher:
+    # A long wait, so only membership decides when a batch runs.
+    batcher = RetrievalBatcher(max_wait_seconds=5.0)
+
+    def search(queries: list[str]) -> list[list[Document]]:
+        searches.append(queries)
+        return [[Document(page_content=query)] for query in queries]
+
+    batcher.search = search
+    return batcher
+
+
+def test_batcher_waits_for_every_member():
+    searches = []
+    batcher = recording_batcher(searches)
+    batcher.join("thread-a")
+    batcher.join("thread-b")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(batcher.retrieve, "rice blast", "thread-a")
+        time.sleep(0.05)
+        assert not first.done()
+
+        second = executor.submit(batcher.retrieve, "wheat rust", "thread-b")
+        assert first.result(timeout=1)[0].page_content == "rice blast"
+        assert second.result(timeout=1)[0].page_content == "wheat rust"
+
+    assert searches == [["rice blast", "wheat rust"]]
+
+
+def test_batcher_runs_once_the_other_members_leave():
+    searches = []
+    batcher = recording_batcher(searches)
+    batcher.join("thread-a")
+    batcher.join("thread-b")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = executor.submit(batcher.retrieve, "rice blast", "thread-a")
+        time.sleep(0.05)
+        assert not first.done()
+
+        # e.g. thread-b was routed to the calculator.
+        batcher.leave("thread-b")
+        batcher.leave("thread-b")
+        assert first.result(timeout=1)[0].page_content == "rice blast"
+
+    assert searches == [["rice blast"]]
+
+
+# HedgedLLM
+
+
+def test_hedging_stays_within_budget():
+    model = FakeChatModel(
+        latency_seconds=0.01,
+        tokens_per_second=1_000_000,
+        output_tokens=1,
+        jitter=0.5
+    )
+    hedged = HedgedLLM(
+        LLMScheduler(model, max_concurrency=4),
+        enabled=True,
+        # Hedge any call slower than the fastest one seen, so far more
+        # calls want a hedge than the budget allows.
+        hedge_percentile=0.0,
+        budget=0.1,
+        min_samples=5,
+        min_delay_seconds=0.0
+    )
+
+    for number in range(50):
+        hedged.invoke(f"Question {number}")
+
+    metrics = hedged.metrics()
+    assert metrics["calls"] == 50
+    assert 0 < metrics["hedges"] <= 0.1 * metrics["calls"]
+    assert model.calls <= metrics["calls"] + metrics["hedges"]
@@ -0,0 +1,58 @@
+import math
+
+
+def percentile(
+    values: list[float],
+    q: float,
+) -> float:
+    """
+    Returns the q-th percentile of the given values.
+
+    Uses linear interpolation between the closest ranks.
+
+    Args:
+        values: Observed values, in any order.
+        q: Percentile between 0 and 100.
+
+    Returns:
+        The percentile, or 0.0 when no values exist.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * (q / 100)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+
+    if lower == upper:
+        return ordered[lower]
+
+    weight = rank - lower
+    return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+
+def summarize(
+    values: list[float],
+) -> dict:
+    """
+    Returns count, mean, p50, p95, p99 and max of the given values.
+    """
+    if not values:
+        return {
+            "count": 0,
+            "mean": 0.0,
+            "p50": 0.0,
+            "p95": 0.0,
+            "p99": 0.0,
+            "max": 0.0,
+        }
+
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
@@ -0,0 +1,215 @@
+import cProfile
+import functools
+import itertools
+import json
+import pstats
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import PROFILING_DIR, PROFILING_SAMPLE_EVERY_N
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+_active_profile: ContextVar["RequestProfile | None"] = ContextVar(
+    "active_profile",
+    default=None
+)
+
+
+class RequestProfile:
+    """
+    Timing breakdown of a single chat request.
+
+    Spans are recorded by category (node, llm_queue, llm_call,
+    embedding, chroma_query, prompt_build) and name, from any thread
+    that carries the request's context.
+    """
+
+    def __init__(self, metadata: dict | None = None):
+        self.metadata = metadata or {}
+        self.total_seconds = 0.0
+        self._spans: list[tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+        self._stats: pstats.Stats | None = None
+
+    def add(self, category: str, name: str, seconds: float) -> None:
+        with self._lock:
+            self._spans.append((category, name, seconds))
+
+    def finish(
+        self,
+        profiler: cProfile.Profile | None,
+        seconds: float,
+    ) -> None:
+        self.total_seconds = seconds
+        if profiler is not None:
+            self._stats = pstats.Stats(profiler)
+
+    def summary(self, top_functions: int = 25) -> dict:
+        categories: dict[str, dict] = {}
+        with self._lock:
+            spans = list(self._spans)
+
+        for category, name, seconds in spans:
+            entry = categories.setdefault(
+                category,
+                {"total_seconds": 0.0, "count": 0, "by_name": {}}
+            )
+            entry["total_seconds"] += seconds
+            entry["count"] += 1
+            entry["by_name"][name] = entry["by_name"].get(name, 0.0) + seconds
+
+        return {
+            **self.metadata,
+            "total_seconds": self.total_seconds,
+            "spans": categories,
+            "top_functions": self._top_functions(top_functions),
+        }
+
+    def _top_functions(self, limit: int) -> list[dict]:
+        if self._stats is None:
+            return []
+
+        rows = []
+        for (filename, line, function), (
+            _, calls, total, cumulative, _
+        ) in self._stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "total_seconds": total,
+                "cumulative_seconds": cumulative,
+            })
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        return rows[:limit]
+
+    def save(self, directory: Path, top_functions: int = 25) -> Path:
+        """
+        Writes the summary as JSON and the raw cProfile stats next to it
+        (readable with `python -m pstats` or snakeviz).
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        summary_path = directory / f"{stem}.json"
+        summary_path.write_text(
+            json.dumps(self.summary(top_functions), indent=2)
+        )
+        if self._stats is not None:
+            self._stats.dump_stats(directory / f"{stem}.prof")
+        return summary_path
+
+
+class span:
+    """
+    Times a block into the active request profile, if any.
+
+    Without an active profile this is one ContextVar lookup.
+    """
+
+    __slots__ = ("category", "name", "profile", "started")
+
+    def __init__(self, category: str, name: str = ""):
+        self.category = category
+        self.name = name or category
+
+    def __enter__(self):
+        self.profile = _active_profile.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.add(
+                self.category,
+                self.name,
+                time.perf_counter() - self.started
+            )
+        return False
+
+
+def profiled(category: str):
+    """
+    Decorator form of `span`, named after the wrapped function.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active_profile.get() is None:
+                return function(*args, **kwargs)
+            with span(category, function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Python 3.12+ allows one active cProfile profiler per process.
+_cprofile_lock = threading.Lock()
+
+
+def run_profiled(profile: RequestProfile, function, *args, **kwargs):
+    """
+    Runs `function` with `profile` active and, if no other request is
+    being profiled, under cProfile.
+
+    Concurrent profiled requests record spans only. Profiling errors
+    are reported and never fail the request.
+    """
+    token = _active_profile.set(profile)
+    profiler = None
+    if _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as exc:
+            # Another profiler (e.g. a debugger) is active.
+            print(f"cProfile unavailable: {exc}")
+            profiler = None
+            _cprofile_lock.release()
+    profile.metadata["cprofile"] = profiler is not None
+
+    started = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            _cprofile_lock.release()
+        try:
+            profile.finish(profiler, seconds)
+        except Exception as exc:
+            print(f"Failed to collect profile: {exc}")
+        _active_profile.reset(token)
+
+
+class ProfileSampler:
+    """
+    Selects one request in every `every_n` for background profiling.
+    """
+
+    def __init__(self, every_n: int):
+        self.every_n = every_n
+        self._counter = itertools.count(1)
+
+    def should_sample(self) -> bool:
+        if self.every_n <= 0:
+            return False
+        return next(self._counter) % self.every_n == 0
+
+
+@lru_cache(maxsize=1)
+def get_profile_sampler() -> ProfileSampler:
+    return ProfileSampler(PROFILING_SAMPLE_EVERY_N)
+
+
+def get_profile_directory() -> Path:
+    # Relative paths are relative to the project root.
+    path = Path(PROFILING_DIR)
+    if not path.is_absolute():
+        path = ROOT_DIR / path
+    return path
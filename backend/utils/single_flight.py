@@ -0,0 +1,130 @@
+import re
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable, TypeVar
+
+from config.settings import SINGLE_FLIGHT_ENABLED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive
+    while it is still running wait for, and receive, the same result
+    (or exception). Nothing is cached once the call has finished.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._calls: dict[Hashable, tuple[Future, object]] = {}
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._shared = 0
+
+    def do(
+        self,
+        key: Hashable,
+        function: Callable[[], T],
+        group=None,
+        on_wait: Callable[[], None] | None = None,
+        retry_on: tuple[type[BaseException], ...] = (),
+    ) -> T:
+        """
+        Runs `function`, or waits for the run already in flight for
+        `key`.
+
+        Args:
+            group: This caller's model.scheduler.CallGroup, which
+                `function` runs its LLM calls with. A caller that waits
+                joins it into the running call's group, so the shared
+                call runs with the most urgent priority and the latest
+                deadline among its callers.
+            on_wait: Called before a caller starts waiting.
+            retry_on: Exceptions of the shared run after which waiting
+                callers run `function` again instead of failing, such
+                as a queue timeout that came before their own deadline.
+        """
+        if not self.enabled:
+            return function()
+
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = (Future(), group)
+                    self._calls[key] = call
+                    self._executions += 1
+                else:
+                    self._shared += 1
+
+            future, leader_group = call
+            if is_leader:
+                break
+
+            if group is not None and leader_group is not None:
+                leader_group.join(group)
+            if on_wait is not None:
+                on_wait()
+            try:
+                return future.result()
+            except retry_on:
+                continue
+
+        try:
+            result = function()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self._executions + self._shared
+            return {
+                "executions": self._executions,
+                "shared": self._shared,
+                "in_flight": len(self._calls),
+                "hit_rate": self._shared / requests if requests else 0.0,
+            }
+
+
+_flights: dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """
+    Returns the process-wide SingleFlight registered under `name`.
+    """
+    with _flights_lock:
+        if name not in _flights:
+            _flights[name] = SingleFlight(
+                name,
+                enabled=SINGLE_FLIGHT_ENABLED
+            )
+        return _flights[name]
+
+
+def single_flight_stats() -> dict[str, dict]:
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {flight.name: flight.stats() for flight in flights}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercases a query, collapses whitespace and drops trailing
+    punctuation so trivially different phrasings share a key.
+    """
+    normalized = re.sub(r"\s+", " ", query).strip().lower()
+    return normalized.rstrip("?.! ")
@@ -0,0 +1,38 @@
+import math
+
+from langchain_core.messages import BaseMessage
+
+# Llama tokenizers average roughly four characters of English per token.
+CHARS_PER_TOKEN = 4
+
+# Role markers and separators the chat template adds around each message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Returns an approximate token count for `text`.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_prompt_tokens(prompt) -> int:
+    """
+    Returns an approximate token count for an LLM input.
+
+    Args:
+        prompt: A string or a list of messages.
+    """
+    if isinstance(prompt, str):
+        return estimate_tokens(prompt)
+
+    total = 0
+    for message in prompt:
+        content = (
+            message.content if isinstance(message, BaseMessage)
+            else str(message)
+        )
+        total += estimate_tokens(str(content)) + MESSAGE_OVERHEAD_TOKENS
+    return total
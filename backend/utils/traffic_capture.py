@@ -0,0 +1,104 @@
+import json
+import logging
+import queue
+from functools import lru_cache
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+)
+from pathlib import Path
+
+from config.settings import (
+    CAPTURE_ENABLED,
+    CAPTURE_PATH,
+    CAPTURE_MAX_BYTES,
+    CAPTURE_BACKUP_COUNT,
+)
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+class TrafficRecorder:
+    """
+    Appends one JSON line per chat request to a rotating log.
+
+    `record()` only enqueues the entry; a background listener thread
+    does the file I/O and rotation, so request handling never waits
+    on the disk.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int,
+        backup_count: int,
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+
+        file_handler = RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+
+        self._queue: queue.Queue = queue.Queue()
+        self._listener = QueueListener(self._queue, file_handler)
+
+        self._logger = logging.getLogger(f"krushiverse.capture.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(QueueHandler(self._queue))
+
+        self._listener.start()
+
+    def record(self, entry: dict) -> None:
+        self._logger.info(
+            json.dumps(entry, ensure_ascii=False)
+        )
+
+    def stop(self) -> None:
+        """
+        Flushes pending entries and stops the writer thread.
+        """
+        self._listener.stop()
+
+
+@lru_cache(maxsize=1)
+def get_traffic_recorder() -> TrafficRecorder | None:
+    """
+    Returns the process-wide recorder, or None when capture is disabled.
+    """
+    if not CAPTURE_ENABLED:
+        return None
+
+    path = Path(CAPTURE_PATH)
+    if not path.is_absolute():
+        path = ROOT_DIR / path
+
+    return TrafficRecorder(
+        path,
+        max_bytes=CAPTURE_MAX_BYTES,
+        backup_count=CAPTURE_BACKUP_COUNT,
+    )
+
+
+def load_captured_requests(path: Path) -> list[dict]:
+    """
+    Reads a capture log and its rotated backups, oldest entry first.
+    """
+    files = [path, *path.parent.glob(f"{path.name}.*")]
+    entries = []
+    for file in files:
+        if not file.is_file():
+            continue
+        with open(file, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+
+    return sorted(entries, key=lambda entry: entry["started_at"])
@@ -0,0 +1,101 @@
+"""
+Exercise the LLM scheduler against a local fake Groq server.
+
+The server enforces its own rate limit (and can reject a random share
+of requests) with 429 + Retry-After; the scheduler should absorb that
+with throttling and retries instead of failing calls.
+
+    python scripts/check_llm_scheduler.py --calls 60 --server-rpm 30
+"""
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import sys
+import time
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+os.environ.setdefault("GROQ_API_KEY", "offline-scheduler-check")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--client-threads", type=int, default=20)
+    parser.add_argument("--server-rpm", type=int, default=30)
+    parser.add_argument("--server-429-probability", type=float, default=0.1)
+    parser.add_argument("--server-retry-after", type=float, default=1.0)
+    parser.add_argument("--server-latency", type=float, default=0.1)
+    parser.add_argument(
+        "--client-rpm",
+        type=int,
+        default=0,
+        help="scheduler requests-per-minute limit (0 = rely on retries only)",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=5)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    from langchain_groq import ChatGroq
+
+    from benchmarks.fake_groq_server import FakeGroqServer
+    from model.scheduler import LLMScheduler, Priority
+
+    server = FakeGroqServer(
+        requests_per_minute=args.server_rpm,
+        rate_limit_probability=args.server_429_probability,
+        retry_after_seconds=args.server_retry_after,
+        latency_seconds=args.server_latency,
+    ).start()
+
+    scheduler = LLMScheduler(
+        ChatGroq(
+            api_key="offline-scheduler-check",
+            base_url=server.base_url,
+            model="fake-model",
+            max_retries=0,
+            timeout=10,
+        ),
+        max_concurrency=args.max_concurrency,
+        requests_per_minute=args.client_rpm,
+        max_retries=args.max_retries,
+        queue_timeout_seconds=600,
+    )
+
+    priorities = list(Priority)
+    failures = []
+
+    def call(index: int) -> None:
+        try:
+            scheduler.invoke(
+                f"Question {index}",
+                priority=priorities[index % len(priorities)]
+            )
+        except Exception as exc:
+            failures.append(f"{type(exc).__name__}: {exc}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.client_threads) as executor:
+        list(executor.map(call, range(args.calls)))
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    print(json.dumps({
+        "elapsed_seconds": elapsed,
+        "failures": len(failures),
+        "failure_samples": failures[:5],
+        "server": server.stats,
+        "scheduler": scheduler.metrics(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from pathlib import Path
+import argparse
+import json
+import sys
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from benchmarks.results import compare_reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare two benchmark reports written by run_benchmarks.py"
+    )
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument(
+        "--filter",
+        default="",
+        help="only show metrics whose path contains this text",
+    )
+    parser.add_argument("--json", action="store_true", help="print rows as JSON")
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    head = json.loads(args.head.read_text())
+    rows = [
+        row for row in compare_reports(base, head)
+        if args.filter in row["metric"]
+    ]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"base: {base['commit'][:12]}  head: {head['commit'][:12]}")
+    for row in rows:
+        change = (
+            f"{row['change']:+.1%}" if row["change"] is not None else "n/a"
+        )
+        print(
+            f"{row['metric']:<70} {row['base']:>12.4f} "
+            f"{row['head']:>12.4f} {change:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
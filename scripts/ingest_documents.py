@@ -3,10 +3,9 @@ import sys
 
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "backend"))
 
-from backend.rag.ingest import ingest
+from rag.ingest import ingest
 
 if __name__ == "__main__":
     ingest()
-
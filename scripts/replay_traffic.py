@@ -0,0 +1,113 @@
+"""
+Replay a captured traffic log against the agent graph.
+
+Capture is enabled on the API with CAPTURE_ENABLED=true; every /chat
+request is appended to CAPTURE_PATH (rotated backups are read too).
+
+    python scripts/replay_traffic.py traffic/requests.jsonl --speed 1.0
+    python scripts/replay_traffic.py traffic/requests.jsonl --fake-llm
+"""
+from pathlib import Path
+import argparse
+import os
+import sys
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log", type=Path, help="capture log written by the API")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="conversation threads replayed at once",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=None,
+        help="keep original inter-arrival times, scaled (1.0 = real time)",
+    )
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument(
+        "--fake-llm",
+        action="store_true",
+        help="replay against the offline fake chat model instead of Groq",
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=250.0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.fake_llm:
+        os.environ.setdefault("GROQ_API_KEY", "offline-replay")
+
+        from benchmarks.fakes import FakeChatModel, install_fake_llm
+        install_fake_llm(FakeChatModel(
+            latency_seconds=args.llm_latency,
+            tokens_per_second=args.llm_tokens_per_second,
+        ))
+
+    from agent.graph_builder import graph
+    from benchmarks.replay import replay
+    from benchmarks.results import build_report, write_report
+    from utils.traffic_capture import load_captured_requests
+
+    entries = load_captured_requests(args.log.resolve())
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        print(f"No captured requests in {args.log}")
+        return
+
+    print(f"Replaying {len(entries)} requests")
+    results = replay(
+        graph,
+        entries,
+        concurrency=args.concurrency,
+        speed=args.speed,
+    )
+
+    report = build_report(
+        config={
+            key: (str(value) if isinstance(value, Path) else value)
+            for key, value in vars(args).items()
+        },
+        results={"replay": results},
+    )
+
+    output = args.output or (
+        ROOT_DIR / "bench_results"
+        / f"replay-{report['commit'][:12]}-{report['created_at'].replace(':', '')}.json"
+    )
+    write_report(report, output)
+
+    replayed = results["replayed_latency_seconds"]
+    captured = results["captured_latency_seconds"]
+    print(
+        f"p50 {captured['p50']:.3f}s -> {replayed['p50']:.3f}s, "
+        f"p99 {captured['p99']:.3f}s -> {replayed['p99']:.3f}s, "
+        f"route agreement {results['route_agreement']:.1%}, "
+        f"errors {results['errors']}"
+    )
+    if results["schedule_lag_seconds"]:
+        lag = results["schedule_lag_seconds"]
+        print(
+            f"behind schedule: p50 {lag['p50']:.3f}s, p99 {lag['p99']:.3f}s "
+            "(raise --concurrency if large)"
+        )
+    for name, stats in results["single_flight"].items():
+        print(f"single-flight {name}: hit rate {stats['hit_rate']:.1%}")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
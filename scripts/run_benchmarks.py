@@ -0,0 +1,246 @@
+"""
+Offline performance benchmarks for KrushiVerse.
+
+Swaps the Groq client for a fake chat model with fixed latency and
+token rate, and by default MiniLM for a hashing embedding function,
+so runs never touch provider quota. Results are written as JSON.
+
+    python scripts/run_benchmarks.py --suites chat batch retrieval ingest quality
+    python scripts/compare_benchmarks.py base.json head.json
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+# settings.py refuses to import without a key; the fake model never uses it.
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from benchmarks.fakes import (
+    FakeChatModel,
+    HashingEmbeddings,
+    install_fake_llm,
+    use_vector_store,
+)
+from benchmarks.results import build_report, write_report
+
+SUITES = ("chat", "batch", "retrieval", "ingest", "quality")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+
+    llm = parser.add_argument_group("fake LLM")
+    llm.add_argument("--llm-latency", type=float, default=0.2)
+    llm.add_argument("--llm-tokens-per-second", type=float, default=250.0)
+    llm.add_argument("--llm-output-tokens", type=int, default=150)
+    llm.add_argument("--llm-jitter", type=float, default=0.0)
+    llm.add_argument("--llm-slow-probability", type=float, default=0.0)
+    llm.add_argument("--llm-slow-factor", type=float, default=10.0)
+    llm.add_argument(
+        "--hedging",
+        action="store_true",
+        help="hedge slow answer generations (see LLM_HEDGE_* settings)",
+    )
+
+    embeddings = parser.add_argument_group("embeddings")
+    embeddings.add_argument(
+        "--embeddings",
+        choices=("hashing", "model"),
+        default="hashing",
+        help="hashing: deterministic stub; model: the real MiniLM model",
+    )
+    embeddings.add_argument("--embedding-dimensions", type=int, default=384)
+
+    chat = parser.add_argument_group("chat")
+    chat.add_argument("--chat-requests", type=int, default=200)
+    chat.add_argument("--chat-concurrency", type=int, nargs="+", default=[1, 8, 32])
+    chat.add_argument("--chat-turns-per-thread", type=int, default=1)
+    chat.add_argument("--chat-corpus-size", type=int, default=2000)
+    chat.add_argument("--chat-rag-weight", type=float, default=0.6)
+    chat.add_argument("--chat-calculator-weight", type=float, default=0.2)
+    chat.add_argument("--chat-chatbot-weight", type=float, default=0.2)
+
+    batch = parser.add_argument_group("batch")
+    batch.add_argument("--batch-requests", type=int, default=64)
+    batch.add_argument("--batch-size", type=int, default=32)
+    batch.add_argument("--batch-max-concurrency", type=int, default=8)
+
+    retrieval = parser.add_argument_group("retrieval")
+    retrieval.add_argument(
+        "--retrieval-sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="collection sizes in chunks, e.g. 10000 100000 1000000",
+    )
+    retrieval.add_argument("--retrieval-queries", type=int, default=200)
+
+    ingest = parser.add_argument_group("ingest")
+    ingest.add_argument("--ingest-pdfs", type=int, default=20)
+    ingest.add_argument("--ingest-pages-per-pdf", type=int, default=10)
+
+    quality = parser.add_argument_group("retrieval quality")
+    quality.add_argument(
+        "--quality-dataset",
+        choices=("synthetic", "kb"),
+        default="synthetic",
+        help="kb: ingest knowledge_base/raw and use benchmarks/data/kb_queries.json",
+    )
+    quality.add_argument("--quality-corpus-size", type=int, default=2000)
+    quality.add_argument("--quality-queries", type=int, default=200)
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    fake_llm = FakeChatModel(
+        latency_seconds=args.llm_latency,
+        tokens_per_second=args.llm_tokens_per_second,
+        output_tokens=args.llm_output_tokens,
+        jitter=args.llm_jitter,
+        slow_probability=args.llm_slow_probability,
+        slow_factor=args.llm_slow_factor,
+        seed=args.seed,
+    )
+    install_fake_llm(fake_llm, hedging=args.hedging)
+
+    if args.embeddings == "hashing":
+        embeddings = HashingEmbeddings(args.embedding_dimensions)
+    else:
+        from rag.embedding_model import get_embedding_model
+        embeddings = get_embedding_model()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="krushiverse-bench-") as tmp:
+        workdir = Path(tmp)
+
+        if "chat" in args.suites or "batch" in args.suites:
+            from benchmarks.chat_load import run_batch_load, run_chat_load
+            from benchmarks.corpus import generate_chunks
+
+            use_vector_store(workdir / "chat_chroma", embeddings)
+
+            from benchmarks.retrieval import ADD_BATCH_SIZE
+            from rag.vector_store import get_vector_store
+
+            chunks = generate_chunks(args.chat_corpus_size, seed=args.seed)
+            for start in range(0, len(chunks), ADD_BATCH_SIZE):
+                get_vector_store().add_texts(
+                    chunks[start:start + ADD_BATCH_SIZE]
+                )
+
+            # Imported only after the fake LLM is installed.
+            from main import app
+            from agent.graph_builder import graph
+
+            route_weights = {
+                "rag": args.chat_rag_weight,
+                "calculator": args.chat_calculator_weight,
+                "chatbot": args.chat_chatbot_weight,
+            }
+
+        if "chat" in args.suites:
+            results["chat"] = []
+            for concurrency in args.chat_concurrency:
+                print(f"chat: concurrency={concurrency}")
+                results["chat"].append(asyncio.run(run_chat_load(
+                    app,
+                    graph,
+                    requests=args.chat_requests,
+                    concurrency=concurrency,
+                    turns_per_thread=args.chat_turns_per_thread,
+                    route_weights=route_weights,
+                    seed=args.seed,
+                )))
+            results["chat_llm_calls"] = fake_llm.calls
+
+            from utils.single_flight import single_flight_stats
+            results["chat_single_flight"] = single_flight_stats()
+
+            from model.groq_client import generation_llm
+            results["chat_hedging"] = generation_llm.metrics()
+
+        if "batch" in args.suites:
+            print(f"batch: size={args.batch_size}")
+            results["batch"] = asyncio.run(run_batch_load(
+                app,
+                requests=args.batch_requests,
+                batch_size=args.batch_size,
+                max_concurrency=args.batch_max_concurrency,
+                route_weights=route_weights,
+                seed=args.seed,
+            ))
+
+        if "retrieval" in args.suites:
+            from benchmarks.retrieval import run_retrieval_scaling
+
+            print(f"retrieval: sizes={args.retrieval_sizes}")
+            results["retrieval"] = run_retrieval_scaling(
+                workdir / "retrieval_chroma",
+                embeddings,
+                sizes=args.retrieval_sizes,
+                queries=args.retrieval_queries,
+                seed=args.seed,
+            )
+
+        if "ingest" in args.suites:
+            from benchmarks.ingestion import run_ingest_throughput
+
+            print(f"ingest: pdfs={args.ingest_pdfs}")
+            results["ingest"] = run_ingest_throughput(
+                workdir / "ingest",
+                embeddings,
+                pdfs=args.ingest_pdfs,
+                pages_per_pdf=args.ingest_pages_per_pdf,
+                seed=args.seed,
+            )
+
+        if "quality" in args.suites:
+            from benchmarks.retrieval_quality import run_retrieval_quality
+
+            print(
+                f"quality: dataset={args.quality_dataset} "
+                f"embeddings={args.embeddings}"
+            )
+            results["quality"] = run_retrieval_quality(
+                workdir / "quality",
+                embeddings,
+                embeddings_name=args.embeddings,
+                dataset=args.quality_dataset,
+                corpus_size=args.quality_corpus_size,
+                queries=args.quality_queries,
+                seed=args.seed,
+            )
+            if "warning" in results["quality"]:
+                print(f"quality: {results['quality']['warning']}")
+
+    report = build_report(
+        config={
+            key: (str(value) if isinstance(value, Path) else value)
+            for key, value in vars(args).items()
+        },
+        results=results,
+    )
+
+    output = args.output or (
+        ROOT_DIR / "bench_results"
+        / f"{report['commit'][:12]}-{report['created_at'].replace(':', '')}.json"
+    )
+    write_report(report, output)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
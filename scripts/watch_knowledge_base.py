@@ -0,0 +1,53 @@
+"""
+Watch knowledge_base/raw and re-ingest it whenever its PDFs change.
+
+Each change produces a new index version; running API processes switch
+to it on their next index check, without a restart.
+
+    python scripts/watch_knowledge_base.py --debounce 5
+"""
+from pathlib import Path
+import argparse
+import sys
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+
+def parse_args() -> argparse.Namespace:
+    from config.settings import (
+        KB_WATCH_POLL_SECONDS,
+        KB_WATCH_DEBOUNCE_SECONDS,
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--poll", type=float, default=KB_WATCH_POLL_SECONDS)
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=KB_WATCH_DEBOUNCE_SECONDS
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    from rag.ingest import PDF_DIRECTORY
+    from rag.kb_watcher import KnowledgeBaseWatcher
+
+    watcher = KnowledgeBaseWatcher(
+        PDF_DIRECTORY,
+        poll_seconds=args.poll,
+        debounce_seconds=args.debounce,
+    )
+    print(f"Watching {PDF_DIRECTORY}")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()